@@ -1,42 +1,149 @@
 """Behave environment setup for integration tests."""
 
+import contextlib
+import io
+import os
 import tempfile
 import shutil
+import multiprocessing
+import traceback
 from pathlib import Path
 
 
+def _cli_worker(conn):
+    """Serve moonbit-up commands over a pipe from a warm interpreter.
+
+    The worker imports the CLI once and then runs each command it receives
+    with the requested environment, replying with (exit_code, output).
+    """
+    from moonbit_up.cli import app
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+
+        args, env = message
+        saved_env = dict(os.environ)
+        os.environ.clear()
+        os.environ.update(env)
+
+        output = io.StringIO()
+        returncode = 0
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                try:
+                    app(args=list(args[1:]), prog_name="moonbit-up")
+                except SystemExit as e:
+                    if isinstance(e.code, int):
+                        returncode = e.code
+                    elif e.code is not None:
+                        print(e.code)
+                        returncode = 1
+                except Exception:
+                    traceback.print_exc()
+                    returncode = 1
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        conn.send((returncode, output.getvalue()))
+
+
 def before_all(context):
     """Set up test environment before all tests."""
     # Store original HOME
-    import os
     context.original_home = os.environ.get("HOME")
+    context.local_bin = str(Path.home() / ".local" / "bin")
+
+    # Everything this run creates lives under one private root, so several
+    # behave processes can run side by side without sharing directories.
+    context.session_root = Path(tempfile.mkdtemp(prefix=f"moonbit-up-behave-{os.getpid()}-"))
+
+    # Build the per-scenario directory skeleton once; scenarios copy it
+    context.template_dir = context.session_root / "template"
+    (context.template_dir / ".config" / "moonbit-up").mkdir(parents=True)
+
+    # Single source file that mock mirror binaries are hardlinked from
+    context.mock_src = context.session_root / "mock-binary"
+    context.mock_src.write_bytes(b"mock binary content")
+
+    # Build the Click command tree and load the help/rendering machinery once,
+    # so the first scenario does not pay for it (a forked worker inherits it)
+    from typer.main import get_command
+    from typer.testing import CliRunner
+    from moonbit_up.cli import app
+
+    get_command(app)
+    CliRunner().invoke(app, ["--help"])
+
+    # In subprocess mode, start one long-lived CLI worker and reuse it
+    context.cli_conn = None
+    context.cli_worker = None
+    if os.environ.get("BEHAVE_USE_SUBPROCESS") == "1":
+        mp_context = multiprocessing.get_context("fork")
+        parent_conn, child_conn = mp_context.Pipe()
+        context.cli_worker = mp_context.Process(
+            target=_cli_worker, args=(child_conn,), daemon=True
+        )
+        context.cli_worker.start()
+        child_conn.close()
+        context.cli_conn = parent_conn
 
 
 def before_scenario(context, scenario):
     """Set up before each scenario."""
-    # Create temporary directory for this scenario
-    context.temp_dir = Path(tempfile.mkdtemp(prefix="moonbit-up-test-"))
+    # Create temporary directory for this scenario from the template.
+    # Files are hardlinked rather than copied; the template is never mutated.
+    # Scenario directories are removed together with the session root in
+    # after_all rather than one by one.
+    context.temp_dir = Path(
+        tempfile.mkdtemp(prefix="scenario-", dir=context.session_root)
+    )
+    shutil.copytree(
+        context.template_dir,
+        context.temp_dir,
+        dirs_exist_ok=True,
+        copy_function=os.link,
+    )
+    context.temp_dir_str = str(context.temp_dir)
+
+    # Environment for moonbit-up commands, built once per scenario
+    context.cli_env = {
+        "HOME": context.temp_dir_str,
+        "PATH": f"{context.local_bin}:{os.environ.get('PATH', '')}",
+    }
+    context.subprocess_env = {
+        **os.environ,
+        **context.cli_env,
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
 
     # Initialize variables
     context.config_dir = None
     context.mirror_dir = None
+    context.mirror_dir_str = None
+    context.path_subs = {}
     context.last_command = None
-    context.last_result = None
     context.last_output = ""
     context.last_returncode = None
 
 
-def after_scenario(context, scenario):
-    """Clean up after each scenario."""
-    # Remove temporary directory
-    if hasattr(context, 'temp_dir') and context.temp_dir.exists():
-        shutil.rmtree(context.temp_dir, ignore_errors=True)
-
-
 def after_all(context):
     """Clean up after all tests."""
+    # Stop the CLI worker if one was started
+    if getattr(context, "cli_worker", None) is not None:
+        context.cli_conn.send(None)
+        context.cli_worker.join(timeout=5)
+        if context.cli_worker.is_alive():
+            context.cli_worker.kill()
+        context.cli_conn.close()
+
+    # Remove the session root, including the scenario template
+    if getattr(context, "session_root", None) is not None:
+        shutil.rmtree(context.session_root, ignore_errors=True)
+
     # Restore original HOME if it was changed
     if hasattr(context, 'original_home'):
-        import os
         if context.original_home:
             os.environ["HOME"] = context.original_home
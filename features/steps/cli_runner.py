@@ -0,0 +1,77 @@
+"""Helpers for invoking moonbit-up from step definitions.
+
+Commands run in-process through Typer's CliRunner so each step avoids
+spawning a shell and a fresh interpreter. Set BEHAVE_USE_SUBPROCESS=1 to
+run commands in a child process instead; environment.py then starts one
+long-lived worker process that serves every command.
+"""
+
+import contextlib
+import functools
+import os
+import shlex
+import subprocess
+
+from typer.testing import CliRunner
+
+from moonbit_up.cli import app
+
+
+runner = CliRunner()
+
+
+def use_subprocess() -> bool:
+    """Return True if commands should run in a child process."""
+    return os.environ.get("BEHAVE_USE_SUBPROCESS") == "1"
+
+
+@functools.lru_cache(maxsize=256)
+def split_command(command):
+    """Split a command line into argv, caching repeated commands."""
+    return tuple(shlex.split(command))
+
+
+def run_moonbit_up(context, command, timeout=60):
+    """Run a moonbit-up command line and return (exit_code, output).
+
+    Commands run with the scenario environment prepared in before_scenario.
+    """
+    args = split_command(command)
+    assert args[0] == "moonbit-up", f"Unsupported command: {command}"
+
+    conn = getattr(context, "cli_conn", None)
+    if conn is not None:
+        conn.send((args, context.subprocess_env))
+        if not conn.poll(timeout):
+            raise TimeoutError(f"Command timed out after {timeout}s: {command}")
+        return conn.recv()
+
+    if use_subprocess():
+        # stderr is merged into stdout so there is a single output buffer
+        result = subprocess.run(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=context.subprocess_env,
+            timeout=timeout
+        )
+        return result.returncode, result.stdout
+
+    # The runner only needs the overrides; the rest is already in os.environ
+    result = runner.invoke(app, args[1:], env=context.cli_env, catch_exceptions=False)
+    return result.exit_code, result.output
+
+
+@contextlib.contextmanager
+def scenario_home(context):
+    """Point HOME at the scenario directory for direct moonbit_up API calls."""
+    original_home = os.environ.get("HOME")
+    os.environ["HOME"] = context.cli_env["HOME"]
+    try:
+        yield
+    finally:
+        if original_home is None:
+            del os.environ["HOME"]
+        else:
+            os.environ["HOME"] = original_home
@@ -1,12 +1,12 @@
 """Common step definitions for Behave tests."""
 
 import os
-import json
-import shutil
-import subprocess
-from pathlib import Path
+import stat
 from behave import given, when, then, use_step_matcher
 
+from cli_runner import run_moonbit_up
+from mirror_index import get_index_versions, get_release_count
+
 
 use_step_matcher("parse")
 
@@ -18,7 +18,7 @@ def step_clean_config_dir(context):
     context.config_dir.mkdir(parents=True, exist_ok=True)
 
     # Set environment to use temp config
-    os.environ["HOME"] = str(context.temp_dir)
+    os.environ["HOME"] = context.temp_dir_str
 
 
 @given("a temporary mirror directory")
@@ -26,33 +26,31 @@ def step_temp_mirror_dir(context):
     """Create a temporary mirror directory."""
     context.mirror_dir = context.temp_dir / "test-mirror"
     context.mirror_dir.mkdir(parents=True, exist_ok=True)
+    context.mirror_dir_str = str(context.mirror_dir)
+    context.path_subs = {"{mirror_dir}": context.mirror_dir_str}
+
+
+def expand_placeholders(context, text):
+    """Replace scenario placeholders such as {mirror_dir} in step text."""
+    if "{" not in text:
+        return text
+    for placeholder, value in context.path_subs.items():
+        text = text.replace(placeholder, value)
+    return text
 
 
 @when('I run "{command}"')
 def step_run_command(context, command):
     """Run a moonbit-up command."""
     # Replace placeholders
-    command = command.replace("{mirror_dir}", str(context.mirror_dir))
-
-    # Set environment
-    env = os.environ.copy()
-    env["HOME"] = str(context.temp_dir)
-    env["PATH"] = f"{Path.home()}/.local/bin:{env.get('PATH', '')}"
+    command = expand_placeholders(context, command)
 
     # Run command
-    result = subprocess.run(
-        command,
-        shell=True,
-        capture_output=True,
-        text=True,
-        env=env,
-        timeout=60
-    )
+    returncode, output = run_moonbit_up(context, command)
 
     context.last_command = command
-    context.last_result = result
-    context.last_output = result.stdout + result.stderr
-    context.last_returncode = result.returncode
+    context.last_output = output
+    context.last_returncode = returncode
 
 
 @then("the command succeeds")
@@ -93,12 +91,19 @@ def step_output_not_contains(context, text):
     )
 
 
+def path_mode(path):
+    """Return the st_mode of a path with a single stat, or 0 if missing."""
+    try:
+        return os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+
+
 @then('a directory exists at "{path}"')
 def step_directory_exists(context, path):
     """Verify a directory exists."""
-    path = path.replace("{mirror_dir}", str(context.mirror_dir))
-    full_path = Path(path)
-    assert full_path.exists() and full_path.is_dir(), (
+    full_path = expand_placeholders(context, path)
+    assert stat.S_ISDIR(path_mode(full_path)), (
         f"Expected directory to exist at {full_path}"
     )
 
@@ -106,29 +111,17 @@ def step_directory_exists(context, path):
 @then('a file exists at "{path}"')
 def step_file_exists(context, path):
     """Verify a file exists."""
-    path = path.replace("{mirror_dir}", str(context.mirror_dir))
-    full_path = Path(path)
-    assert full_path.exists() and full_path.is_file(), (
+    full_path = expand_placeholders(context, path)
+    assert stat.S_ISREG(path_mode(full_path)), (
         f"Expected file to exist at {full_path}"
     )
 
 
-def get_index_file(context):
-    """Get the mirror index file."""
-    index_file = context.mirror_dir / "index.json"
-    if not index_file.exists():
-        raise FileNotFoundError(f"Index file not found at {index_file}")
-
-    with open(index_file) as f:
-        return json.load(f)
-
-
 @then("the index file contains {count:d} version")
 @then("the index file contains {count:d} versions")
 def step_index_contains_versions(context, count):
     """Verify index contains specific number of versions."""
-    index = get_index_file(context)
-    actual_count = len(index["linux-x64"]["releases"])
+    actual_count = get_release_count(context)
     assert actual_count == count, (
         f"Expected {count} versions but found {actual_count}"
     )
@@ -137,17 +130,15 @@ def step_index_contains_versions(context, count):
 @then("the index file contains multiple versions")
 def step_index_contains_multiple(context):
     """Verify index contains more than one version."""
-    index = get_index_file(context)
-    count = len(index["linux-x64"]["releases"])
+    count = get_release_count(context)
     assert count > 1, f"Expected multiple versions but found {count}"
 
 
 @then('the index file contains version "{version}"')
 def step_index_contains_version(context, version):
     """Verify index contains a specific version."""
-    index = get_index_file(context)
-    versions = [r["version"] for r in index["linux-x64"]["releases"]]
+    versions = get_index_versions(context)
     assert version in versions, (
         f"Expected version {version} not found in index.\\n"
-        f"Available versions: {versions}"
+        f"Available versions: {sorted(versions)}"
     )
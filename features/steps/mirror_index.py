@@ -0,0 +1,40 @@
+"""Helpers for reading the mirror index from step definitions.
+
+The parsed index is cached on the scenario context keyed by path, mtime and
+size, so several assertions against an unchanged file parse it only once.
+"""
+
+import json
+import os
+
+
+def get_index_file(context):
+    """Get the parsed mirror index."""
+    index_file = os.path.join(context.mirror_dir_str, "index.json")
+    try:
+        st = os.stat(index_file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Index file not found at {index_file}") from None
+
+    key = (index_file, st.st_mtime_ns, st.st_size)
+    cache = getattr(context, "_index_cache", None)
+    if cache is None or cache[0] != key:
+        with open(index_file, "rb") as f:
+            cache = (key, json.loads(f.read()), None)
+        context._index_cache = cache
+    return cache[1]
+
+
+def get_index_versions(context):
+    """Get the set of version strings in the mirror index."""
+    index = get_index_file(context)
+    key, _, versions = context._index_cache
+    if versions is None:
+        versions = frozenset(r["version"] for r in index["linux-x64"]["releases"])
+        context._index_cache = (key, index, versions)
+    return versions
+
+
+def get_release_count(context):
+    """Get the number of releases in the mirror index."""
+    return len(get_index_file(context)["linux-x64"]["releases"])
@@ -2,35 +2,49 @@
 
 import json
 import os
+import re
 import time
 from pathlib import Path
 from behave import given, when, then
 
+from moonbit_up.config import set_mirror
+
+from cli_runner import scenario_home
+from mirror_index import get_release_count
+
+
+MOCK_BINARY_CONTENT = b"mock binary content"
+LOCAL_MIRROR_PATTERN = re.compile("file://|(?i:mock)")
+
 
 @given("a mirror exists with {count:d} version")
 @given("a mirror exists with {count:d} versions")
 def step_mirror_exists_with_versions(context, count):
     """Create a mirror with specific number of versions."""
-    context.mirror_dir.mkdir(parents=True, exist_ok=True)
-    releases_dir = context.mirror_dir / "releases"
-    releases_dir.mkdir(exist_ok=True)
+    releases_dir = os.path.join(context.mirror_dir_str, "releases")
+    os.makedirs(releases_dir, exist_ok=True)
 
     # Create mock versions
-    versions = []
-    for i in range(count):
-        version_str = f"0.1.2024120{i}+mock{i}"
-        version_dir = releases_dir / f"v{version_str}"
-        version_dir.mkdir(exist_ok=True)
-
-        filename = f"moonbit-v{version_str}-linux-x64.tar.gz"
-        binary_path = version_dir / filename
-        binary_path.write_bytes(b"mock binary content")
-
-        versions.append({
+    version_strs = [f"0.1.2024120{i}+mock{i}" for i in range(count)]
+    versions = [
+        {
             "version": version_str,
-            "name": filename,
+            "name": f"moonbit-v{version_str}-linux-x64.tar.gz",
             "sha256": "mock_sha256_hash"
-        })
+        }
+        for version_str in version_strs
+    ]
+
+    for version in versions:
+        version_dir = os.path.join(releases_dir, f"v{version['version']}")
+        os.mkdir(version_dir)
+        binary_path = os.path.join(version_dir, version["name"])
+        try:
+            os.link(context.mock_src, binary_path)
+        except OSError:
+            # Hardlinks can fail across devices; write the content instead
+            with open(binary_path, "wb", buffering=0) as f:
+                f.write(MOCK_BINARY_CONTENT)
 
     # Create index
     index_data = {
@@ -41,8 +55,7 @@ def step_mirror_exists_with_versions(context, count):
     }
 
     index_file = context.mirror_dir / "index.json"
-    with open(index_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    index_file.write_text(json.dumps(index_data, separators=(",", ":")))
 
     # Store initial version count
     context.initial_version_count = count
@@ -60,13 +73,16 @@ def step_store_binary_timestamp(context):
     """Store the timestamp of a binary file."""
     releases_dir = context.mirror_dir / "releases"
     # Find first binary file
-    for version_dir in releases_dir.iterdir():
-        if version_dir.is_dir():
-            for file in version_dir.iterdir():
-                if file.suffix == ".gz":
-                    context.binary_file = file
-                    context.binary_timestamp = file.stat().st_mtime
-                    return
+    with os.scandir(releases_dir) as version_dirs:
+        for version_dir in version_dirs:
+            if not version_dir.is_dir():
+                continue
+            with os.scandir(version_dir.path) as files:
+                for file in files:
+                    if file.name.endswith(".gz"):
+                        context.binary_file = Path(file.path)
+                        context.binary_timestamp = file.stat().st_mtime
+                        return
 
     raise FileNotFoundError("No binary file found in mirror")
 
@@ -85,26 +101,10 @@ def step_configure_file_urls(context):
     index_url = f"file://{context.mirror_dir}/index.json"
     download_url = f"file://{context.mirror_dir}/releases"
 
-    command = (
-        f'moonbit-up config '
-        f'--index-url "{index_url}" '
-        f'--download-url "{download_url}"'
-    )
-
-    env = os.environ.copy()
-    env["HOME"] = str(context.temp_dir)
-
-    import subprocess
-    result = subprocess.run(
-        command,
-        shell=True,
-        capture_output=True,
-        text=True,
-        env=env,
-        timeout=10
-    )
-
-    assert result.returncode == 0, f"Failed to configure URLs: {result.stderr}"
+    with scenario_home(context):
+        assert set_mirror(index_url=index_url, download_url=download_url), (
+            "Failed to configure URLs"
+        )
 
 
 @given("moonbit-up is configured to use the local mirror")
@@ -116,27 +116,15 @@ def step_configured_for_local_mirror(context):
 @given("moonbit-up is configured with a custom mirror")
 def step_configured_custom_mirror(context):
     """Configure with a custom mirror URL."""
-    command = 'moonbit-up config --index-url "https://custom-mirror.example.com/index.json"'
-
-    env = os.environ.copy()
-    env["HOME"] = str(context.temp_dir)
-
-    import subprocess
-    result = subprocess.run(
-        command,
-        shell=True,
-        capture_output=True,
-        text=True,
-        env=env,
-        timeout=10
-    )
+    with scenario_home(context):
+        set_mirror(index_url="https://custom-mirror.example.com/index.json")
 
 
 @then("the output lists versions from the local mirror")
 def step_lists_local_versions(context):
     """Verify output lists versions from local mirror."""
     # Check that we fetched from file:// URL
-    assert "file://" in context.last_output or "mock" in context.last_output.lower()
+    assert LOCAL_MIRROR_PATTERN.search(context.last_output)
 
 
 @then("the output contains {count:d} version")
@@ -150,11 +138,7 @@ def step_output_contains_versions(context, count):
 @then("the index file contains more versions than before")
 def step_index_has_more_versions(context):
     """Verify index has more versions after sync."""
-    index_file = context.mirror_dir / "index.json"
-    with open(index_file) as f:
-        index = json.load(f)
-
-    new_count = len(index["linux-x64"]["releases"])
+    new_count = get_release_count(context)
     assert new_count > context.initial_version_count, (
         f"Expected more than {context.initial_version_count} versions, "
         f"but found {new_count}"
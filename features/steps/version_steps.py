@@ -1,10 +1,18 @@
 """Step definitions for version listing feature."""
 
 import json
-import subprocess
-from pathlib import Path
+import re
 from behave import given, then
 
+from moonbit_up.config import set_mirror
+
+from cli_runner import scenario_home
+
+
+# Date pattern (YYYY-MM-DD) and version table indicators
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+TABLE_PATTERN = re.compile("┃|│|Version|Release Date")
+
 
 @given('I have previously installed version "{version}"')
 def step_previously_installed_version(context, version):
@@ -24,35 +32,21 @@ def step_previously_installed_version(context, version):
         ]
     }
 
-    with open(history_file, 'w') as f:
-        json.dump(history_data, f, indent=2)
+    history_file.write_text(json.dumps(history_data, separators=(",", ":")))
 
 
 @given("the version index is unavailable")
 def step_version_index_unavailable(context):
     """Configure to use an unavailable index URL."""
-    command = 'moonbit-up config --index-url "https://nonexistent-mirror-12345.example.com/index.json"'
-
-    env = {
-        "HOME": str(context.temp_dir),
-        "PATH": f"{Path.home()}/.local/bin:{Path.home()}/bin:/usr/local/bin:/usr/bin:/bin"
-    }
-
-    result = subprocess.run(
-        command,
-        shell=True,
-        capture_output=True,
-        text=True,
-        env=env,
-        timeout=10
-    )
+    with scenario_home(context):
+        set_mirror(index_url="https://nonexistent-mirror-12345.example.com/index.json")
 
 
 @then("the output contains a table with version numbers")
 def step_output_has_version_table(context):
     """Verify output contains a version table."""
     # Look for table indicators
-    assert any(indicator in context.last_output for indicator in ["┃", "│", "Version", "Release Date"])
+    assert TABLE_PATTERN.search(context.last_output)
 
 
 @then("the output shows at most {count:d} versions")
@@ -74,9 +68,7 @@ def step_output_all_versions(context):
 def step_entries_have_dates(context):
     """Verify version entries have formatted dates."""
     # Look for date patterns (YYYY-MM-DD)
-    import re
-    date_pattern = r'\d{4}-\d{2}-\d{2}'
-    assert re.search(date_pattern, context.last_output), (
+    assert DATE_PATTERN.search(context.last_output), (
         "No formatted dates found in output"
     )
 
@@ -1,6 +1,44 @@
 """Entry point for moonbit-up CLI."""
 
-from moonbit_up.cli import app
+import sys
 
-if __name__ == "__main__":
+
+def main():
+    """Run the moonbit-up CLI.
+
+    ``--version`` is answered before the Typer app is imported, so it does not
+    pay for building the command tree.
+    """
+    if sys.argv[1:] in (["--version"], ["-v"]):
+        from moonbit_up import __version__
+        print(f"moonbit-up version {__version__}")
+        return
+
+    from moonbit_up.cli import app
+    _register_only_invoked_command(app, sys.argv[1:])
     app()
+
+
+def _register_only_invoked_command(app, args):
+    """Drop every command except the one named on the command line.
+
+    Typer builds a Click command for each registered command on every run;
+    when the subcommand is known up front only that one needs building.
+    Unknown names keep the full set so Typer can report them as usual.
+    """
+    subcommand = next((arg for arg in args if not arg.startswith("-")), None)
+    if subcommand is None:
+        return
+
+    from typer.main import get_command_name
+
+    selected = [
+        info for info in app.registered_commands
+        if (info.name or get_command_name(info.callback.__name__)) == subcommand
+    ]
+    if selected:
+        app.registered_commands = selected
+
+
+if __name__ == "__main__":
+    main()
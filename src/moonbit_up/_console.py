@@ -0,0 +1,34 @@
+"""Shared Rich console, created on first use."""
+
+import functools
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+@functools.cache
+def get_console() -> "Console":
+    """Get the shared console, creating it on first use."""
+    from rich.console import Console
+    return Console()
+
+
+class _LazyConsole:
+    """Stand-in for the shared console that creates it on first use.
+
+    Modules keep a ``console`` attribute, so tests can still patch it, without
+    importing rich.console or probing the terminal at import time.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+    def __enter__(self):
+        return get_console().__enter__()
+
+    def __exit__(self, *exc_info):
+        return get_console().__exit__(*exc_info)
+
+
+console = _LazyConsole()
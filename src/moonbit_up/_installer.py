@@ -0,0 +1,461 @@
+"""Implementation of the MoonBit toolchain installer.
+
+The functions here back the methods of ``installer.MoonBitInstaller`` and are
+imported on first use, so importing the installer does not load requests or
+tarfile. rich.progress is only imported by the functions that download.
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from .utils import (
+    ensure_amd64_libs,
+    backup_moon_home,
+    setup_wrappers,
+    get_current_version,
+    get_session,
+    HTTP_TIMEOUT,
+    DOWNLOAD_CHUNK_SIZE,
+    TOOLCHAIN_DIRS,
+    copy_moon_tree,
+)
+from .config import load_config
+
+# Minimum seconds between progress bar updates (~30 Hz)
+PROGRESS_INTERVAL = 0.033
+
+
+def _console():
+    """Get the installer console (looked up at call time so it can be patched)."""
+    from . import installer
+    return installer.console
+
+
+def download_toolchain(installer, version: str = "latest") -> Optional[Path]:
+    """Download the MoonBit toolchain."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    console = _console()
+    url = installer.get_download_url(version)
+    console.print(f"[cyan]Downloading MoonBit toolchain ({version})...[/cyan]")
+
+    try:
+        # Create temporary file
+        temp_dir = Path(tempfile.mkdtemp())
+        tar_path = temp_dir / "moonbit.tar.gz"
+
+        # Handle file:// URLs
+        if url.startswith("file://"):
+            source_path = Path(url.replace("file://", ""))
+            if not source_path.exists():
+                console.print(f"[red]Error: Source file not found: {source_path}[/red]")
+                return None
+            shutil.copy2(source_path, tar_path)
+            console.print("[green]File copied from local mirror[/green]")
+            return tar_path
+
+        # Handle HTTP/HTTPS URLs
+        response = get_session().get(url, stream=True, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+
+        # Download with progress
+        total_size = int(response.headers.get('content-length', 0))
+        with open(tar_path, 'wb') as f:
+            if total_size == 0:
+                f.write(response.content)
+            else:
+                downloaded = 0
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    console=console
+                ) as progress:
+                    task = progress.add_task("Downloading...", total=total_size)
+                    last_update = 0.0
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        now = time.monotonic()
+                        if now - last_update >= PROGRESS_INTERVAL:
+                            progress.update(task, completed=downloaded)
+                            last_update = now
+                    progress.update(task, completed=downloaded)
+
+        console.print("[green]Download complete[/green]")
+        return tar_path
+
+    except requests.exceptions.RequestException as e:
+        console.print(f"[red]Error downloading toolchain: {e}[/red]")
+        return None
+
+
+# Use the safe "data" extraction filter where tarfile supports it
+_EXTRACT_KWARGS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+class _ProgressReader:
+    """Read-only file wrapper that hashes and reports bytes read.
+
+    Every chunk read updates digest, if given. Progress reports to on_read
+    are batched to at most one per PROGRESS_INTERVAL; call flush() once
+    reading is done to report the remainder.
+    """
+
+    def __init__(self, raw, on_read=None, digest=None):
+        self._raw = raw
+        self._on_read = on_read
+        self._digest = digest
+        self._pending = 0
+        self._last_update = 0.0
+
+    def read(self, size=-1):
+        data = self._raw.read(size)
+        if self._digest is not None:
+            self._digest.update(data)
+        if self._on_read is not None:
+            self._pending += len(data)
+            now = time.monotonic()
+            if now - self._last_update >= PROGRESS_INTERVAL:
+                self.flush()
+                self._last_update = now
+        return data
+
+    def drain(self):
+        """Read whatever the archive reader left unread, e.g. the gzip trailer."""
+        while self.read(DOWNLOAD_CHUNK_SIZE):
+            pass
+
+    def flush(self):
+        """Report any bytes not yet passed to the callback."""
+        if self._pending:
+            self._on_read(self._pending)
+            self._pending = 0
+
+
+def _extract_members(tar: tarfile.TarFile, staging: Path) -> None:
+    """Extract the toolchain directories of an archive into staging."""
+    for member in tar:
+        parts = member.name.removeprefix("./").split("/")
+        if parts[0] not in TOOLCHAIN_DIRS:
+            continue
+        # Executables under bin/ get their execute bits as they are written,
+        # so the installed tree needs no second chmod pass
+        if parts[0] == "bin" and len(parts) == 2 and member.isfile() and not member.mode & 0o100:
+            member.mode = 0o755
+        tar.extract(member, staging, **_EXTRACT_KWARGS)
+
+
+def _install_tree(staging: Path, dest: Path) -> None:
+    """Move extracted toolchain directories from staging into dest."""
+    dest.mkdir(parents=True, exist_ok=True)
+
+    # The archive extracts to bin/, lib/, include/ directories
+    for item in TOOLCHAIN_DIRS:
+        src = staging / item
+        if src.exists():
+            dst = dest / item
+            if dst.exists():
+                shutil.rmtree(dst)
+            try:
+                # Staging normally sits next to dest, so this is a rename
+                os.replace(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(src, dst)
+
+
+def extract_toolchain(installer, tar_path: Path, dest: Path) -> bool:
+    """Extract the toolchain archive."""
+    console = _console()
+    console.print("[cyan]Extracting toolchain...[/cyan]")
+
+    try:
+        with tarfile.open(tar_path, 'r|gz', bufsize=DOWNLOAD_CHUNK_SIZE) as tar:
+            # Extract to temporary location first
+            temp_extract = tar_path.parent / "extract"
+            temp_extract.mkdir(exist_ok=True)
+
+            _extract_members(tar, temp_extract)
+            _install_tree(temp_extract, dest)
+
+        console.print("[green]Extraction complete[/green]")
+        return True
+
+    except Exception as e:
+        console.print(f"[red]Error extracting toolchain: {e}[/red]")
+        return False
+
+
+def download_and_extract(installer, url: str, dest: Path, sha256: Optional[str] = None) -> bool:
+    """Stream the toolchain archive from url and extract it into dest.
+
+    The archive is never written to disk: it is decompressed and unpacked as
+    it arrives, into a staging directory next to dest. If sha256 is given the
+    archive is hashed in the same pass and nothing is installed on mismatch.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    console = _console()
+    console.print("[cyan]Downloading and extracting MoonBit toolchain...[/cyan]")
+
+    digest = hashlib.sha256() if sha256 else None
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".moonbit-up-", dir=dest.parent))
+    try:
+        # Handle file:// URLs
+        if url.startswith("file://"):
+            source_path = Path(url.replace("file://", ""))
+            if not source_path.exists():
+                console.print(f"[red]Error: Source file not found: {source_path}[/red]")
+                return False
+            with open(source_path, 'rb') as f:
+                reader = _ProgressReader(f, digest=digest)
+                with tarfile.open(
+                    fileobj=reader, mode='r|gz', bufsize=DOWNLOAD_CHUNK_SIZE
+                ) as tar:
+                    _extract_members(tar, staging)
+                reader.drain()
+        else:
+            # Handle HTTP/HTTPS URLs
+            with get_session().get(url, stream=True, timeout=HTTP_TIMEOUT) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+
+                total_size = int(response.headers.get('content-length', 0))
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    console=console
+                ) as progress:
+                    task = progress.add_task("Downloading...", total=total_size or None)
+                    reader = _ProgressReader(
+                        response.raw,
+                        lambda n: progress.update(task, advance=n),
+                        digest=digest,
+                    )
+                    with tarfile.open(
+                        fileobj=reader, mode='r|gz', bufsize=DOWNLOAD_CHUNK_SIZE
+                    ) as tar:
+                        _extract_members(tar, staging)
+                    reader.drain()
+                    reader.flush()
+
+        if digest is not None and digest.hexdigest() != sha256.lower():
+            console.print(
+                f"[red]Checksum mismatch: expected {sha256}, got {digest.hexdigest()}[/red]"
+            )
+            return False
+
+        _install_tree(staging, dest)
+
+        console.print("[green]Download and extraction complete[/green]")
+        return True
+
+    except requests.exceptions.RequestException as e:
+        console.print(f"[red]Error downloading toolchain: {e}[/red]")
+        return False
+    except Exception as e:
+        console.print(f"[red]Error extracting toolchain: {e}[/red]")
+        return False
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def preserve_user_data(installer, backup_path: Optional[Path]) -> None:
+    """Preserve user data like registry and credentials from backup."""
+    console = _console()
+    if not backup_path or not backup_path.exists():
+        return
+
+    # Preserve registry
+    backup_registry = backup_path / "registry"
+    if backup_registry.exists():
+        dest_registry = installer.moon_home / "registry"
+        if dest_registry.exists():
+            shutil.rmtree(dest_registry)
+        # Copied rather than linked: moon updates registry files in place
+        shutil.copytree(backup_registry, dest_registry)
+        console.print("[green]Preserved registry data[/green]")
+
+    # Preserve credentials
+    backup_creds = backup_path / "credentials.json"
+    if backup_creds.exists():
+        dest_creds = installer.moon_home / "credentials.json"
+        # Older backups may hardlink the live file; copying aside and renaming
+        # works for those and gives moon home its own copy
+        staged_creds = dest_creds.with_name(f".{dest_creds.name}.tmp")
+        shutil.copy2(backup_creds, staged_creds)
+        os.replace(staged_creds, dest_creds)
+        console.print("[green]Preserved credentials[/green]")
+
+    # Preserve core library if it exists in backup but not in new installation
+    backup_core = backup_path / "lib" / "core"
+    dest_core = installer.moon_home / "lib" / "core"
+    if backup_core.exists() and not dest_core.exists():
+        # Copied rather than linked: moon rebuilds core artifacts in place
+        shutil.copytree(backup_core, dest_core, symlinks=True)
+        console.print("[green]Preserved core library[/green]")
+
+
+def verify_installation(installer) -> bool:
+    """Verify the installation by running moon version."""
+    console = _console()
+    console.print("[cyan]Verifying installation...[/cyan]")
+
+    moon_bin = installer.moon_home / "bin" / "moon"
+    if not moon_bin.exists():
+        console.print("[red]Error: moon binary not found[/red]")
+        return False
+
+    try:
+        result = subprocess.run(
+            [str(moon_bin), "version"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+
+        if result.returncode == 0:
+            version = result.stdout.strip()
+            console.print(f"[green]Installation verified: {version}[/green]")
+            return True
+        else:
+            console.print(f"[red]Verification failed: {result.stderr}[/red]")
+            return False
+
+    except Exception as e:
+        console.print(f"[red]Error verifying installation: {e}[/red]")
+        return False
+
+
+def install(installer, version: str = "latest", skip_backup: bool = False) -> bool:
+    """Install or update MoonBit toolchain."""
+    console = _console()
+    console.print("[bold cyan]MoonBit Toolchain Installer[/bold cyan]\n")
+
+    # Check current version first; a pinned version that is already
+    # installed needs no index lookup at all
+    current = get_current_version()
+    if current:
+        console.print(f"Current version: {current}")
+        if version not in ("latest", "nightly") and current == version:
+            console.print("[yellow]Already at target version[/yellow]")
+            return True
+
+    # Resolve version (the index is revalidated against its cached ETag)
+    console.print(f"Resolving version: {version}")
+    try:
+        url, resolved_version, sha256 = installer.resolve_release(version)
+    except Exception as e:
+        console.print(f"[red]Failed to resolve version: {e}[/red]")
+        return False
+    console.print(f"Target version: {resolved_version}\n")
+
+    if current and current == resolved_version:
+        console.print("[yellow]Already at target version[/yellow]")
+        return True
+
+    # Ensure AMD64 libraries are set up
+    if not ensure_amd64_libs():
+        return False
+
+    # Create backup if requested and installation exists
+    backup_path = None
+    if not skip_backup and installer.moon_home.exists():
+        backup_path = backup_moon_home()
+
+    # Download and extract straight into moon home
+    expected_sha256 = sha256 if load_config().installation.verify_checksums else None
+    if not installer.download_and_extract(url, installer.moon_home, expected_sha256):
+        return False
+
+    # Preserve user data
+    installer.preserve_user_data(backup_path)
+
+    # Set up wrapper scripts
+    setup_wrappers(installer.moon_home)
+
+    # Verify installation
+    if not installer.verify_installation():
+        console.print("[red]Installation verification failed[/red]")
+        return False
+
+    # Record version in history
+    installed_version = get_current_version()
+    if installed_version:
+        installer.version_manager.add_version(installed_version, backup_path)
+
+    console.print("\n[bold green]Installation complete![/bold green]")
+    console.print(f"MoonBit toolchain installed at: {installer.moon_home}")
+
+    return True
+
+
+def rollback(installer) -> bool:
+    """Rollback to the previous version."""
+    console = _console()
+    console.print("[bold cyan]Rolling back MoonBit installation[/bold cyan]\n")
+
+    # Get previous version info
+    previous = installer.version_manager.get_previous_version()
+    if not previous:
+        console.print("[yellow]No previous version found to rollback to[/yellow]")
+        return False
+
+    if not previous.backup_path:
+        console.print("[red]No backup available for rollback[/red]")
+        return False
+
+    backup_path = Path(previous.backup_path)
+    if not backup_path.exists():
+        console.print(f"[red]Backup not found at {backup_path}[/red]")
+        return False
+
+    console.print(f"Rolling back to version: {previous.version}")
+
+    moon_home = installer.moon_home
+    moon_home.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".moonbit-up-rollback-", dir=moon_home.parent))
+    retired = None
+    try:
+        # Rebuild the backup next to moon home. Toolchain files are hardlinked;
+        # user data is copied so later writes to it leave the backup intact.
+        copy_moon_tree(backup_path, staging, dirs_exist_ok=True)
+
+        # Swap it in with renames so moon home is never half restored
+        if moon_home.exists():
+            retired = Path(tempfile.mkdtemp(prefix=".moonbit-up-retired-", dir=moon_home.parent))
+            os.replace(moon_home, retired / moon_home.name)
+        try:
+            os.replace(staging, moon_home)
+        except OSError:
+            if retired is not None:
+                os.replace(retired / moon_home.name, moon_home)
+            raise
+
+        console.print("[green]Rollback successful[/green]")
+
+        # Verify
+        installer.verify_installation()
+
+        return True
+
+    except Exception as e:
+        console.print(f"[red]Error during rollback: {e}[/red]")
+        return False
+
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
@@ -3,13 +3,8 @@
 import typer
 from typing import Optional, List
 from pathlib import Path
-from rich.console import Console
 
-from .installer import MoonBitInstaller
-from .version import VersionManager, fetch_available_versions, get_latest_for_channel
-from .utils import get_current_version
-from .config import show_config, set_mirror, reset_config
-from .mirror import MirrorManager
+from ._console import get_console
 
 app = typer.Typer(
     name="moonbit-up",
@@ -17,7 +12,8 @@ app = typer.Typer(
     add_completion=False,
 )
 
-console = Console()
+# Command implementations (and rich, requests, etc.) are imported inside each
+# command so that --help, --version and argument errors stay fast.
 
 
 @app.command()
@@ -47,6 +43,9 @@ def update(
 
     This is the default command when no subcommand is specified.
     """
+    from .installer import MoonBitInstaller
+
+    console = get_console()
     installer = MoonBitInstaller()
     # Nightly flag or channel overrides version argument
     target_version = "nightly" if nightly or (channel == "nightly") else version
@@ -85,6 +84,9 @@ def list_versions(
     Shows available versions that can be installed from moonbit-binaries,
     as well as previously installed versions tracked locally.
     """
+    from .version import fetch_available_versions, get_latest_for_channel
+
+    console = get_console()
     if nightly or (channel == "nightly"):
         latest = get_latest_for_channel("nightly")
         if not latest:
@@ -104,6 +106,10 @@ def current():
     """
     Show the currently installed MoonBit version.
     """
+    from .utils import get_current_version
+    from .version import VersionManager
+
+    console = get_console()
     version = get_current_version()
 
     if version:
@@ -126,6 +132,8 @@ def rollback():
 
     Restores the most recent backup of the MoonBit toolchain.
     """
+    from .installer import MoonBitInstaller
+
     installer = MoonBitInstaller()
     success = installer.rollback()
 
@@ -142,6 +150,8 @@ def history():
 
     Displays all previously installed versions with their installation dates.
     """
+    from .version import VersionManager
+
     manager = VersionManager()
     manager.show_history()
 
@@ -175,6 +185,9 @@ def config(
     Configure custom mirrors for the MoonBit binaries index and downloads.
     Useful for setting up local mirrors or using alternative sources.
     """
+    from .config import show_config, set_mirror, reset_config
+
+    console = get_console()
     if reset:
         if reset_config():
             console.print("[green]Configuration reset to defaults[/green]")
@@ -241,6 +254,8 @@ def mirror(
       moonbit-up mirror serve --port 8080          # Serve on port 8080
       moonbit-up mirror info                       # Show mirror stats
     """
+    from .mirror import MirrorManager
+
     if path is None:
         path = Path.home() / "moonbit-mirror"
 
@@ -265,6 +280,7 @@ def mirror(
         manager.serve_mirror(port=port)
 
     else:
+        console = get_console()
         console.print(f"[red]Unknown action: {action}[/red]")
         console.print("Valid actions: create, sync, info, serve")
         raise typer.Exit(1)
@@ -288,7 +304,7 @@ def main(
     """
     if version:
         from . import __version__
-        console.print(f"moonbit-up version {__version__}")
+        get_console().print(f"moonbit-up version {__version__}")
         raise typer.Exit(0)
 
     # If no subcommand was specified, run update
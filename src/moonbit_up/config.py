@@ -1,14 +1,19 @@
 """Configuration management for moonbit-up."""
 
+import json
 import os
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
-from rich.console import Console
+from typing import Optional, TYPE_CHECKING
+from dataclasses import dataclass, asdict, replace
 
 import tomllib
 
-console = Console()
+from ._console import console
+from .utils import _ensure_dir
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Tuple
+
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -53,7 +58,7 @@ class Config:
     nightly: NightlyConfig
     installation: InstallationConfig
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self) -> "Dict[str, Any]":
         """Convert to dictionary."""
         return {
             "mirror": asdict(self.mirror),
@@ -64,35 +69,12 @@ class Config:
 
 def get_config_path() -> Path:
     """Get the configuration file path."""
-    config_dir = Path.home() / ".config" / "moonbit-up"
-    config_dir.mkdir(parents=True, exist_ok=True)
+    config_dir = _ensure_dir(Path.home() / ".config" / "moonbit-up")
     return config_dir / "config.toml"
 
 
-def load_config() -> Config:
-    """Load configuration from file or return default."""
-    config_path = get_config_path()
-
-    if config_path.exists():
-        try:
-            with open(config_path, "rb") as f:
-                data = tomllib.load(f)
-
-            # Merge with defaults (in case of missing keys)
-            mirror_data = {**DEFAULT_CONFIG["mirror"], **data.get("mirror", {})}
-            nightly_data = {**DEFAULT_CONFIG["nightly"], **data.get("nightly", {})}
-            installation_data = {**DEFAULT_CONFIG["installation"], **data.get("installation", {})}
-
-            return Config(
-                mirror=MirrorConfig(**mirror_data),
-                nightly=NightlyConfig(**nightly_data),
-                installation=InstallationConfig(**installation_data),
-            )
-        except Exception as e:
-            console.print(f"[yellow]Warning: Could not load config: {e}[/yellow]")
-            console.print("[yellow]Using default configuration[/yellow]")
-
-    # Return default config
+def _default_config() -> Config:
+    """Build a Config from the defaults."""
     return Config(
         mirror=MirrorConfig(**DEFAULT_CONFIG["mirror"]),
         nightly=NightlyConfig(**DEFAULT_CONFIG["nightly"]),
@@ -100,9 +82,65 @@ def load_config() -> Config:
     )
 
 
+def _copy_config(config: Config) -> Config:
+    """Copy a Config so callers can mutate it without touching the cache."""
+    return Config(
+        mirror=replace(config.mirror),
+        nightly=replace(config.nightly),
+        installation=replace(config.installation),
+    )
+
+
+# Last parsed config, keyed by (path, mtime, size) of the file it came from
+_config_cache: "Optional[Tuple[Tuple[Path, int, int], Config]]" = None
+
+
+def load_config() -> Config:
+    """Load configuration from file or return default.
+
+    The parsed file is cached until it changes on disk, so repeated calls in
+    one run only stat the file. Each call returns a fresh copy.
+    """
+    global _config_cache
+    config_path = get_config_path()
+
+    try:
+        st = config_path.stat()
+    except FileNotFoundError:
+        return _default_config()
+
+    key = (config_path, st.st_mtime_ns, st.st_size)
+    if _config_cache is not None and _config_cache[0] == key:
+        return _copy_config(_config_cache[1])
+
+    try:
+        with open(config_path, "rb") as f:
+            data = tomllib.load(f)
+
+        # Merge with defaults (in case of missing keys)
+        mirror_data = {**DEFAULT_CONFIG["mirror"], **data.get("mirror", {})}
+        nightly_data = {**DEFAULT_CONFIG["nightly"], **data.get("nightly", {})}
+        installation_data = {**DEFAULT_CONFIG["installation"], **data.get("installation", {})}
+
+        config = Config(
+            mirror=MirrorConfig(**mirror_data),
+            nightly=NightlyConfig(**nightly_data),
+            installation=InstallationConfig(**installation_data),
+        )
+    except Exception as e:
+        console.print(f"[yellow]Warning: Could not load config: {e}[/yellow]")
+        console.print("[yellow]Using default configuration[/yellow]")
+        return _default_config()
+
+    _config_cache = (key, config)
+    return _copy_config(config)
+
+
 def save_config(config: Config) -> bool:
     """Save configuration to file."""
+    global _config_cache
     config_path = get_config_path()
+    _config_cache = None
 
     try:
         # Convert to TOML format
@@ -118,23 +156,24 @@ def save_config(config: Config) -> bool:
         return False
 
 
+def _toml_value(value: "Any") -> str:
+    """Format a scalar config value as TOML."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    # JSON string escapes are valid TOML basic-string escapes; TOML also
+    # forbids a raw DEL character, which JSON leaves alone
+    return json.dumps(str(value), ensure_ascii=False).replace("\x7f", "\\u007f")
+
+
 def _config_to_toml(config: Config) -> str:
     """Convert Config object to TOML string."""
-    toml_lines = [
-        "# moonbit-up configuration",
-        "",
-        "[mirror]",
-        f'index_url = "{config.mirror.index_url}"',
-        f'download_base_url = "{config.mirror.download_base_url}"',
-        "",
-        "[nightly]",
-        f'dist_server = "{config.nightly.dist_server}"',
-        "",
-        "[installation]",
-        f'backup_enabled = {str(config.installation.backup_enabled).lower()}',
-        f'verify_checksums = {str(config.installation.verify_checksums).lower()}',
-        "",
-    ]
+    toml_lines = ["# moonbit-up configuration", ""]
+    for section, values in config.to_dict().items():
+        toml_lines.append(f"[{section}]")
+        toml_lines.extend(f"{key} = {_toml_value(value)}" for key, value in values.items())
+        toml_lines.append("")
     return "\n".join(toml_lines)
 
 
@@ -155,12 +194,7 @@ def set_mirror(index_url: Optional[str] = None, download_url: Optional[str] = No
 
 def reset_config() -> bool:
     """Reset configuration to defaults."""
-    config = Config(
-        mirror=MirrorConfig(**DEFAULT_CONFIG["mirror"]),
-        nightly=NightlyConfig(**DEFAULT_CONFIG["nightly"]),
-        installation=InstallationConfig(**DEFAULT_CONFIG["installation"]),
-    )
-    return save_config(config)
+    return save_config(_default_config())
 
 
 def show_config() -> None:
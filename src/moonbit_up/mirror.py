@@ -1,18 +1,104 @@
 """Mirror setup and management for moonbit-binaries."""
 
+import hashlib
 import json
+import os
+import re
 import shutil
 from pathlib import Path
-from typing import Optional, List
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+from typing import Iterator, Optional, List, Tuple
 
-import requests
-
-from .version import fetch_moonbit_binaries_index, list_available_versions
+from .utils import get_session, DOWNLOAD_CHUNK_SIZE, HTTP_TIMEOUT, _write_atomic
+from .version import AvailableVersion, fetch_moonbit_binaries_index, list_available_versions
 from .config import load_config
+from ._console import console
+
+
+# Number of binaries downloaded concurrently when creating or syncing a mirror
+MAX_DOWNLOAD_WORKERS = 8
+
+# Index entries only get verified when they carry a real SHA-256 digest
+SHA256_PATTERN = re.compile(r"[0-9a-fA-F]{64}")
+
+
+def _dir_size(root: Path) -> int:
+    """Return the total size of the regular files under root.
+
+    Walks with os.scandir so the file type comes from the directory listing
+    and each file needs a single stat call. Symlinks are not followed.
+    """
+    total = 0
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+                elif entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+    return total
+
+
+def _mirror_request_handler(directory: Path):
+    """Build a request handler that serves directory with sendfile(2).
+
+    Files go from the page cache straight to the socket instead of being
+    copied through Python in 64 KiB reads.
+    """
+    import functools
+    from http.server import SimpleHTTPRequestHandler
+
+    class MirrorRequestHandler(SimpleHTTPRequestHandler):
+        def copyfile(self, source, outputfile):
+            if outputfile is self.wfile and hasattr(source, "fileno"):
+                self.wfile.flush()
+                self.connection.sendfile(source)
+            else:
+                super().copyfile(source, outputfile)
+
+    return functools.partial(MirrorRequestHandler, directory=str(directory))
+
+
+def _expected_length(response) -> int:
+    """Return the decoded body size announced by response, or 0 if unknown."""
+    # With a content encoding, Content-Length is the compressed size
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return 0
+    try:
+        return max(int(response.headers.get("Content-Length", 0)), 0)
+    except ValueError:
+        return 0
+
+
+def _prepare_download_file(fd: int, size: int) -> None:
+    """Reserve size bytes for a download and hint sequential writes.
+
+    Preallocating lets the filesystem place the file in one extent instead
+    of growing it a chunk at a time. Both calls are best-effort.
+    """
+    if size > 0 and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+class _HashingReader:
+    """Read-only file wrapper that feeds every chunk read into a digest."""
+
+    def __init__(self, raw, digest):
+        self._raw = raw
+        self._digest = digest
 
-console = Console()
+    def read(self, size=-1):
+        data = self._raw.read(size)
+        self._digest.update(data)
+        return data
 
 
 class MirrorManager:
@@ -67,6 +153,8 @@ class MirrorManager:
         config = load_config()
         download_base = config.mirror.download_base_url
 
+        from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -76,31 +164,21 @@ class MirrorManager:
         ) as progress:
             task = progress.add_task("Downloading binaries...", total=len(versions_to_mirror))
 
+            pending = []
             for ver in versions_to_mirror:
-                version_dir = self.releases_dir / f"v{ver.version}"
-                version_dir.mkdir(parents=True, exist_ok=True)
-                binary_path = version_dir / ver.filename
-
                 # Skip if already exists
-                if binary_path.exists():
+                if self._binary_path(ver).exists():
                     progress.console.print(f"[dim]Skipping {ver.version} (already exists)[/dim]")
                     progress.advance(task)
                     continue
+                pending.append(ver)
 
-                # Download binary
-                url = f"{download_base}/v{ver.version}/{ver.filename}"
-                try:
-                    response = requests.get(url, stream=True, timeout=30)
-                    response.raise_for_status()
-
-                    with open(binary_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-
+            # Download binaries concurrently over the shared session
+            for ver, error in self._download_versions(pending, download_base):
+                if error is None:
                     progress.console.print(f"[green]Downloaded {ver.version}[/green]")
-                except Exception as e:
-                    progress.console.print(f"[red]Error downloading {ver.version}: {e}[/red]")
-
+                else:
+                    progress.console.print(f"[red]Error downloading {ver.version}: {error}[/red]")
                 progress.advance(task)
 
         # Create local index.json
@@ -114,6 +192,68 @@ class MirrorManager:
 
         return True
 
+    def _binary_path(self, ver: AvailableVersion) -> Path:
+        """Get the mirror path of a version's binary."""
+        return self.releases_dir / f"v{ver.version}" / ver.filename
+
+    def _download_one(
+        self, ver: AvailableVersion, download_base: str
+    ) -> Tuple[AvailableVersion, Optional[Exception]]:
+        """Download one version into the mirror, returning (version, error)."""
+        binary_path = self._binary_path(ver)
+        try:
+            binary_path.parent.mkdir(parents=True, exist_ok=True)
+            self._download_binary(
+                f"{download_base}/v{ver.version}/{ver.filename}", binary_path, ver.sha256
+            )
+        except Exception as e:
+            return ver, e
+        return ver, None
+
+    def _download_versions(
+        self, versions: List[AvailableVersion], download_base: str
+    ) -> Iterator[Tuple[AvailableVersion, Optional[Exception]]]:
+        """Download versions concurrently, yielding (version, error) as each finishes."""
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        if not versions:
+            return
+        with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as executor:
+            futures = [executor.submit(self._download_one, ver, download_base) for ver in versions]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _download_binary(self, url: str, binary_path: Path, sha256: Optional[str] = None) -> None:
+        """Download a single binary, moving it into place once complete.
+
+        If sha256 is a valid digest, it is checked while the file streams to
+        disk and a mismatching download is discarded.
+        """
+        partial_path = binary_path.with_name(binary_path.name + ".part")
+        digest = hashlib.sha256() if sha256 and SHA256_PATTERN.fullmatch(sha256) else None
+
+        # The response is closed on every path so its connection returns to the pool
+        with get_session().get(url, stream=True, timeout=HTTP_TIMEOUT) as response:
+            response.raise_for_status()
+
+            # Copy the raw stream straight to disk rather than iterating chunks
+            response.raw.decode_content = True
+            source = response.raw if digest is None else _HashingReader(response.raw, digest)
+            try:
+                with open(partial_path, 'wb', buffering=DOWNLOAD_CHUNK_SIZE) as f:
+                    _prepare_download_file(f.fileno(), _expected_length(response))
+                    shutil.copyfileobj(source, f, length=DOWNLOAD_CHUNK_SIZE)
+                    # Drop any preallocated space the body did not fill
+                    f.truncate()
+                if digest is not None and digest.hexdigest() != sha256.lower():
+                    raise ValueError(
+                        f"Checksum mismatch: expected {sha256}, got {digest.hexdigest()}"
+                    )
+                os.replace(partial_path, binary_path)
+            except BaseException:
+                partial_path.unlink(missing_ok=True)
+                raise
+
     def _create_index(self, versions: List) -> None:
         """Create a local index.json file."""
         from datetime import datetime
@@ -132,8 +272,9 @@ class MirrorManager:
             }
         }
 
-        with open(self.index_file, 'w') as f:
-            json.dump(index_data, f, indent=2)
+        # Compact output lets json use its C encoder and write in one call;
+        # the rename means a served index is never seen half-written
+        _write_atomic(self.index_file, json.dumps(index_data, separators=(",", ":")).encode())
 
         console.print(f"[green]Created index: {self.index_file}[/green]")
 
@@ -144,13 +285,9 @@ class MirrorManager:
         Args:
             port: Port to serve on
         """
-        import http.server
-        import socketserver
-        import os
-
-        os.chdir(self.mirror_path)
+        from http.server import ThreadingHTTPServer
 
-        handler = http.server.SimpleHTTPRequestHandler
+        handler = _mirror_request_handler(self.mirror_path)
 
         console.print(f"[cyan]Starting mirror server on port {port}...[/cyan]")
         console.print(f"Mirror URL: http://localhost:{port}/")
@@ -161,7 +298,8 @@ class MirrorManager:
         console.print("\n[yellow]Press Ctrl+C to stop the server[/yellow]\n")
 
         try:
-            with socketserver.TCPServer(("", port), handler) as httpd:
+            # One thread per client, so concurrent installs are not serialized
+            with ThreadingHTTPServer(("", port), handler) as httpd:
                 httpd.serve_forever()
         except KeyboardInterrupt:
             console.print("\n[yellow]Server stopped[/yellow]")
@@ -180,8 +318,7 @@ class MirrorManager:
         console.print("[cyan]Syncing mirror with upstream...[/cyan]\n")
 
         # Load local index
-        with open(self.index_file, 'r') as f:
-            local_index = json.load(f)
+        local_index = json.loads(self.index_file.read_bytes())
 
         local_versions = {r['version'] for r in local_index['linux-x64']['releases']}
 
@@ -198,34 +335,30 @@ class MirrorManager:
 
         console.print(f"[yellow]Found {len(new_versions)} new versions to sync[/yellow]")
 
-        # Download new versions
-        new_version_objs = [v for v in upstream_versions if v.version in new_versions]
+        # Download new versions, skipping binaries an earlier interrupted
+        # sync already fetched
+        pending = []
+        for ver in upstream_versions:
+            if ver.version not in new_versions:
+                continue
+            if self._binary_path(ver).exists():
+                console.print(f"[dim]Skipping {ver.version} (already exists)[/dim]")
+                continue
+            pending.append(ver)
 
         config = load_config()
         download_base = config.mirror.download_base_url
 
-        for ver in new_version_objs:
-            version_dir = self.releases_dir / f"v{ver.version}"
-            version_dir.mkdir(parents=True, exist_ok=True)
-            binary_path = version_dir / ver.filename
-
-            url = f"{download_base}/v{ver.version}/{ver.filename}"
-
-            try:
-                console.print(f"Downloading {ver.version}...")
-                response = requests.get(url, stream=True, timeout=30)
-                response.raise_for_status()
-
-                with open(binary_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-
+        console.print(f"Downloading {len(pending)} versions...")
+        for ver, error in self._download_versions(pending, download_base):
+            if error is None:
                 console.print(f"[green]✓ {ver.version}[/green]")
-            except Exception as e:
-                console.print(f"[red]✗ {ver.version}: {e}[/red]")
+            else:
+                console.print(f"[red]✗ {ver.version}: {error}[/red]")
 
         # Update index
-        all_versions = [v for v in upstream_versions if v.version in (local_versions | new_versions)]
+        all_version_keys = frozenset(local_versions | new_versions)
+        all_versions = [v for v in upstream_versions if v.version in all_version_keys]
         self._create_index(all_versions)
 
         console.print(f"\n[bold green]Sync complete![/bold green]")
@@ -243,8 +376,7 @@ class MirrorManager:
         console.print(f"Index File:   {self.index_file}")
 
         if self.index_file.exists():
-            with open(self.index_file, 'r') as f:
-                index = json.load(f)
+            index = json.loads(self.index_file.read_bytes())
 
             releases = index['linux-x64']['releases']
             console.print(f"\nVersions:     {len(releases)}")
@@ -258,6 +390,6 @@ class MirrorManager:
 
         # Calculate disk usage
         if self.releases_dir.exists():
-            total_size = sum(f.stat().st_size for f in self.releases_dir.rglob('*') if f.is_file())
+            total_size = _dir_size(self.releases_dir)
             size_mb = total_size / (1024 * 1024)
             console.print(f"\nDisk Usage:   {size_mb:.1f} MB")
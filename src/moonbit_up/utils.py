@@ -1,26 +1,129 @@
 """Utility functions for moonbit-up."""
 
+import functools
+import json
 import os
 import shutil
-import subprocess
+import time
 from pathlib import Path
-from typing import Optional
-from rich.console import Console
+from typing import Optional, Sequence, Tuple, TYPE_CHECKING
 import platform
-import requests
 
-console = Console()
+from ._console import console
+
+if TYPE_CHECKING:
+    import requests
+
+
+# Read size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# (connect, read) timeout in seconds for HTTP requests
+HTTP_TIMEOUT = (5, 30)
+
+# Resolved asset URLs are cached on disk for a day; misses are never cached
+PROBE_CACHE_FILE = "asset_probe_cache.json"
+PROBE_CACHE_TTL = 24 * 60 * 60
+PROBE_CACHE_MAX_ENTRIES = 64
+MAX_PROBE_WORKERS = 8
+
+# Installed version, keyed by the moon binary's stat
+CURRENT_VERSION_CACHE_FILE = "current_version.json"
+
+# Top-level directories of the toolchain archive that are installed
+TOOLCHAIN_DIRS = ("bin", "lib", "include")
+
+# Binaries that run through a QEMU wrapper script
+WRAPPED_BINARIES = (
+    "moon", "moonc", "moonfmt", "mooninfo", "mooncake",
+    "moon_cove_report", "moonbit-lsp", "moondoc", "moonrun", "moon-ide",
+)
+
+# The wrapper finds its .real binary from its own name, so one script fits all
+WRAPPER_FILE = ".moonbit-wrapper"
+WRAPPER_SCRIPT = b'''#!/bin/bash
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+BINARY_NAME="$(basename "${BASH_SOURCE[0]}")"
+export QEMU_LD_PREFIX="$HOME/moonbit-amd64-libs"
+exec "$SCRIPT_DIR/$BINARY_NAME.real" "$@"
+'''
 
 def get_moon_home() -> Path:
     """Get the MoonBit home directory."""
     moon_home = os.environ.get("MOON_HOME", os.path.expanduser("~/.moon"))
     return Path(moon_home)
 
+@functools.lru_cache(maxsize=None)
+def _ensure_dir(path: Path) -> Path:
+    """Create a directory once per process."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+@functools.lru_cache(maxsize=None)
+def _umask() -> int:
+    """Return the process umask, read once."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write data to path via a temporary file and rename.
+
+    The file keeps the mode of the file it replaces, or gets the usual
+    0o666 & ~umask for a new file, rather than mkstemp's private 0o600.
+    """
+    import tempfile
+
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask()
+
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            os.fchmod(f.fileno(), mode)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
 def get_config_dir() -> Path:
     """Get the moonbit-up config directory."""
-    config_dir = Path.home() / ".config" / "moonbit-up"
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir
+    return _ensure_dir(Path.home() / ".config" / "moonbit-up")
+
+def get_cache_dir() -> Path:
+    """Get the moonbit-up cache directory."""
+    return _ensure_dir(Path.home() / ".cache" / "moonbit-up")
+
+@functools.lru_cache(maxsize=None)
+def get_session() -> "requests.Session":
+    """Get the shared HTTP session.
+
+    One session is reused for every request so connections are kept alive
+    and pooled, and transient gateway errors are retried.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Only retry gateway errors; failing to connect at all is not transient
+        max_retries=Retry(
+            total=3,
+            connect=0,
+            read=0,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 def get_amd64_libs_dir() -> Path:
     """Get the AMD64 libraries directory."""
@@ -28,6 +131,9 @@ def get_amd64_libs_dir() -> Path:
 
 def ensure_amd64_libs() -> bool:
     """Ensure AMD64 libraries are set up for QEMU."""
+    import subprocess
+    import tarfile
+
     libs_dir = get_amd64_libs_dir()
     lib_dir = libs_dir / "lib"
     lib64_dir = libs_dir / "lib64"
@@ -49,20 +155,98 @@ def ensure_amd64_libs() -> bool:
         lib_dir.mkdir(parents=True, exist_ok=True)
         lib64_dir.mkdir(parents=True, exist_ok=True)
 
-        # Extract libraries from Ubuntu AMD64 container
-        subprocess.run([
+        # Stream the libraries out of an Ubuntu AMD64 container as a tar
+        # archive; there is no bind mount and no copy inside the container
+        args = [
             "docker", "run", "--rm", "--platform", "linux/amd64",
-            "-v", f"{libs_dir}:/output",
-            "ubuntu:24.04", "bash", "-c",
-            "cp -r /lib/x86_64-linux-gnu/* /output/lib/ && cp /lib64/ld-linux-x86-64.so.2 /output/lib64/"
-        ], check=True, capture_output=True)
+            "ubuntu:24.04", "tar", "-cf", "-", "-C", "/lib/x86_64-linux-gnu", ".",
+        ]
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                # The image is trusted, but keep members inside lib/
+                if hasattr(tarfile, "tar_filter"):
+                    tar.extractall(lib_dir, filter="tar")
+                else:
+                    tar.extractall(lib_dir)
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, args)
+
+        # The dynamic loader is the same file the glibc directory ships
+        ld_path = lib64_dir / "ld-linux-x86-64.so.2"
+        ld_path.unlink(missing_ok=True)
+        link_or_copy(str(lib_dir / "ld-linux-x86-64.so.2"), str(ld_path))
 
         console.print("[green]AMD64 libraries set up successfully[/green]")
         return True
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, tarfile.TarError, OSError) as e:
         console.print(f"[red]Error setting up AMD64 libraries: {e}[/red]")
         return False
 
+def link_or_copy(src: str, dst: str) -> None:
+    """Hardlink src to dst, copying instead where a link is not possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def copy_moon_tree(src: Path, dst: Path, **kwargs) -> None:
+    """Copy a moon home tree, hardlinking only the toolchain files.
+
+    bin/, lib/ and include/ are replaced by rename on install and never
+    rewritten in place, so their files can be shared with a backup. The
+    exception is lib/core, where moon rebuilds bundled artifacts in place.
+    That and other user data (registry/, credentials.json) is copied to keep
+    backups unchanged.
+    """
+    src = Path(src)
+
+    def copy_function(file_src: str, file_dst: str) -> None:
+        parts = Path(file_src).relative_to(src).parts
+        if parts[0] in TOOLCHAIN_DIRS and parts[:2] != ("lib", "core"):
+            link_or_copy(file_src, file_dst)
+        else:
+            shutil.copy2(file_src, file_dst)
+
+    shutil.copytree(src, dst, symlinks=True, copy_function=copy_function, **kwargs)
+
+# Backup method that worked last in this process ("reflink" or "hardlink")
+_backup_strategy: Optional[str] = None
+
+def _snapshot_tree(src: Path, dst: Path) -> None:
+    """Snapshot src to dst without copying file contents where possible.
+
+    Copy-on-write clones (cp --reflink=always) are tried first on Linux;
+    otherwise toolchain files are hardlinked and user data is copied.
+    """
+    import subprocess
+
+    global _backup_strategy
+
+    # cp would copy into an existing directory instead of failing like copytree
+    if dst.exists():
+        raise FileExistsError(f"Backup already exists: {dst}")
+
+    if _backup_strategy != "hardlink" and platform.system() == "Linux":
+        try:
+            result = subprocess.run(
+                ["cp", "-a", "--reflink=always", "--no-target-directory", str(src), str(dst)],
+                capture_output=True,
+            )
+        except FileNotFoundError:
+            # No cp on PATH; fall through to hardlinks
+            result = None
+        if result is not None and result.returncode == 0:
+            _backup_strategy = "reflink"
+            return
+        shutil.rmtree(dst, ignore_errors=True)
+
+    copy_moon_tree(src, dst)
+    _backup_strategy = "hardlink"
+
 def backup_moon_home(suffix: Optional[str] = None) -> Optional[Path]:
     """Create a backup of the current Moon installation."""
     moon_home = get_moon_home()
@@ -76,21 +260,60 @@ def backup_moon_home(suffix: Optional[str] = None) -> Optional[Path]:
     backup_path = moon_home.parent / f".moon.backup.{suffix}"
 
     try:
-        shutil.copytree(moon_home, backup_path, symlinks=True)
+        _snapshot_tree(moon_home, backup_path)
         console.print(f"[green]Backup created at {backup_path}[/green]")
         return backup_path
     except Exception as e:
         console.print(f"[red]Error creating backup: {e}[/red]")
         return None
 
+# (binary key, version) of the last version lookup in this process
+_current_version_cache: "Optional[Tuple[list, str]]" = None
+
+def _moon_binary_key(moon_home: Path) -> Optional[list]:
+    """Return [path, inode, ctime_ns, mtime_ns, size] of the real moon binary.
+
+    When the binary is wrapped, moon.real is the file that changes between
+    versions, so that is the one identified. Extraction restores archive
+    mtimes, so the inode and ctime (which every extract or rename changes)
+    are part of the key too. Returns None if no binary is present.
+    """
+    bin_dir = moon_home / "bin"
+    for path in (bin_dir / "moon.real", bin_dir / "moon"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        return [str(path), st.st_ino, st.st_ctime_ns, st.st_mtime_ns, st.st_size]
+    return None
+
 def get_current_version() -> Optional[str]:
-    """Get the currently installed MoonBit version."""
+    """Get the currently installed MoonBit version.
+
+    The result is cached in memory and on disk, keyed by the moon binary's
+    path, inode, ctime, mtime and size, so `moon version` only runs after
+    the binary changes.
+    """
+    global _current_version_cache
+
     moon_home = get_moon_home()
     moon_bin = moon_home / "bin" / "moon"
 
     if not moon_bin.exists():
         return None
 
+    key = _moon_binary_key(moon_home)
+    if _current_version_cache is not None and _current_version_cache[0] == key:
+        return _current_version_cache[1]
+
+    cache_path = get_cache_dir() / CURRENT_VERSION_CACHE_FILE
+    cached = _read_json_cache(cache_path)
+    if cached.get("key") == key and isinstance(cached.get("version"), str):
+        _current_version_cache = (key, cached["version"])
+        return cached["version"]
+
+    import subprocess
+
     try:
         result = subprocess.run(
             [str(moon_bin), "version"],
@@ -103,6 +326,13 @@ def get_current_version() -> Optional[str]:
             output = result.stdout.strip()
             if output.startswith("moon "):
                 version = output.split()[1]
+                _current_version_cache = (key, version)
+                try:
+                    _write_atomic(
+                        cache_path, json.dumps({"key": key, "version": version}).encode()
+                    )
+                except OSError:
+                    pass
                 return version
     except Exception:
         pass
@@ -134,10 +364,13 @@ def detect_target_triple() -> str:
     # Fallback
     return f"{machine}-{system}"
 
-def candidate_asset_names_for_triple(triple: str, date: Optional[str] = None) -> list[str]:
+@functools.lru_cache(maxsize=128)
+def candidate_asset_names_for_triple(triple: str, date: Optional[str] = None) -> tuple[str, ...]:
     """Generate candidate asset filenames for a given target triple.
 
     This accounts for common naming variations used across releases.
+    Results are memoized and returned as an immutable tuple without
+    duplicates, in order of preference.
     Args:
         triple: Target triple like 'x86_64-unknown-linux'
         date: Optional date string for nightly builds (e.g., '2025-11-13')
@@ -145,42 +378,106 @@ def candidate_asset_names_for_triple(triple: str, date: Optional[str] = None) ->
     ext = ".zip" if triple.endswith("pc-windows") else ".tar.gz"
     arch, _, os_part = triple.partition("-")
     # variations seen in community assets
-    candidates = []
-    
-    if date:
+    nightly = (
         # Nightly pattern: moonbit-nightly-YYYY-MM-DD-triple.ext
-        candidates.extend([
-            f"moonbit-nightly-{date}-{triple}{ext}",
-            f"moonbit-nightly-{date}-{os_part}-{arch}{ext}",
-            f"moonbit-nightly-{date}-{arch}-{os_part}{ext}",
-        ])
-    
+        f"moonbit-nightly-{date}-{triple}{ext}",
+        f"moonbit-nightly-{date}-{os_part}-{arch}{ext}",
+        f"moonbit-nightly-{date}-{arch}-{os_part}{ext}",
+    ) if date else ()
     # Standard patterns (for stable or fallback)
-    candidates.extend([
+    standard = (
         f"moonbit-{triple}{ext}",
         f"moonbit-{os_part}-{arch}{ext}",
         f"moonbit-{arch}-{os_part}{ext}",
-    ])
-    if os_part.startswith("unknown-linux"):
-        if date:
-            candidates.append(f"moonbit-nightly-{date}-linux-{arch}{ext}")
-        candidates.append(f"moonbit-linux-{arch}{ext}")
-    return candidates
-
-def probe_first_existing_asset(base_url: str, tag: str, candidates: list[str]) -> Optional[str]:
+    )
+    linux_aliases = (
+        *((f"moonbit-nightly-{date}-linux-{arch}{ext}",) if date else ()),
+        f"moonbit-linux-{arch}{ext}",
+    ) if os_part.startswith("unknown-linux") else ()
+    return tuple(dict.fromkeys(nightly + standard + linux_aliases))
+
+def _head_ok(url: str) -> bool:
+    """Return True if a HEAD request for url answers 200."""
+    try:
+        resp = get_session().head(url, timeout=HTTP_TIMEOUT, allow_redirects=True)
+        return resp.status_code == 200
+    except Exception:
+        return False
+
+def _read_json_cache(path: Path) -> dict:
+    """Load a JSON cache file, or an empty cache if it is unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def probe_first_existing_asset(base_url: str, tag: str, candidates: Sequence[str]) -> Optional[str]:
     """Return the first asset name that exists (HTTP 200) under the given tag.
 
+    Candidates are probed concurrently, but the earliest candidate that
+    exists wins. Resolved URLs are remembered on disk for PROBE_CACHE_TTL
+    seconds so repeated runs skip the round-trips. Misses are not cached,
+    so an asset published later is found on the next call, and the cache
+    keeps at most PROBE_CACHE_MAX_ENTRIES unexpired entries.
+
     Returns the resolved full URL if found, else None.
     """
-    for name in candidates:
-        url = f"{base_url}/{tag}/{name}"
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not candidates:
+        return None
+
+    cache_path = get_cache_dir() / PROBE_CACHE_FILE
+    key = "|".join([base_url, tag, *candidates])
+    cache = _read_json_cache(cache_path)
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("expires_at", 0) > time.time():
+        return entry.get("url")
+
+    # Candidate lists can repeat names; probe each URL once
+    urls = list(dict.fromkeys(f"{base_url}/{tag}/{name}" for name in candidates))
+    resolved = None
+    executor = ThreadPoolExecutor(max_workers=min(len(urls), MAX_PROBE_WORKERS))
+    try:
+        futures = [executor.submit(_head_ok, url) for url in urls]
+        for url, future in zip(urls, futures):
+            if future.result():
+                resolved = url
+                break
+    finally:
+        # Return as soon as the preferred asset is known; probes still in
+        # flight finish in the background and queued ones never start
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if resolved is not None:
+        now = time.time()
+        cache[key] = {"url": resolved, "expires_at": now + PROBE_CACHE_TTL}
+        # Drop expired entries and keep the newest ones, so the file stays small
+        live = sorted(
+            (
+                (k, v) for k, v in cache.items()
+                if isinstance(v, dict) and v.get("expires_at", 0) > now
+            ),
+            key=lambda item: item[1]["expires_at"],
+        )
+        cache = dict(live[-PROBE_CACHE_MAX_ENTRIES:])
         try:
-            resp = requests.head(url, timeout=10, allow_redirects=True)
-            if resp.status_code == 200:
-                return url
-        except Exception:
-            continue
-    return None
+            _write_atomic(cache_path, json.dumps(cache).encode())
+        except OSError:
+            pass
+    return resolved
+
+def _write_wrapper(wrapper: Path) -> None:
+    """Write the wrapper script to wrapper, executable, in one open/close."""
+    fd = os.open(wrapper, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    try:
+        os.write(fd, WRAPPER_SCRIPT)
+        # The mode passed to os.open is masked by umask and ignored for existing files
+        os.fchmod(fd, 0o755)
+    finally:
+        os.close(fd)
 
 def create_wrapper_script(binary_name: str, moon_home: Path) -> bool:
     """Create a wrapper script for a MoonBit binary."""
@@ -191,45 +488,47 @@ def create_wrapper_script(binary_name: str, moon_home: Path) -> bool:
     if not real_binary.exists():
         return False
 
-    wrapper_content = f'''#!/bin/bash
-SCRIPT_DIR="$(cd "$(dirname "${{BASH_SOURCE[0]}}")" && pwd)"
-BINARY_NAME="$(basename "${{BASH_SOURCE[0]}}")"
-export QEMU_LD_PREFIX="$HOME/moonbit-amd64-libs"
-exec "$SCRIPT_DIR/$BINARY_NAME.real" "$@"
-'''
-
     try:
-        wrapper.write_text(wrapper_content)
-        wrapper.chmod(0o755)
+        _write_wrapper(wrapper)
         return True
     except Exception as e:
         console.print(f"[red]Error creating wrapper for {binary_name}: {e}[/red]")
         return False
 
 def setup_wrappers(moon_home: Path) -> None:
-    """Set up wrapper scripts for all MoonBit binaries."""
-    bin_dir = moon_home / "bin"
-    binaries = [
-        "moon", "moonc", "moonfmt", "mooninfo", "mooncake",
-        "moon_cove_report", "moonbit-lsp", "moondoc", "moonrun", "moon-ide"
-    ]
-
-    for binary in binaries:
-        binary_path = bin_dir / binary
-        real_path = bin_dir / f"{binary}.real"
-
-        # Skip if already wrapped
-        if real_path.exists():
-            continue
+    """Set up wrapper scripts for all MoonBit binaries.
 
-        # Skip if binary doesn't exist
-        if not binary_path.exists():
+    The script is written once to bin/.moonbit-wrapper and hardlinked under
+    each binary name, falling back to a separate copy if linking fails.
+    """
+    bin_dir = moon_home / "bin"
+    shared_wrapper = bin_dir / WRAPPER_FILE
+    # One directory listing answers every exists() check below
+    try:
+        existing = set(os.listdir(bin_dir))
+    except FileNotFoundError:
+        existing = set()
+
+    shared_written = False
+    for binary in WRAPPED_BINARIES:
+        # Skip if already wrapped or if the binary doesn't exist
+        if f"{binary}.real" in existing or binary not in existing:
             continue
 
         # Rename original to .real
-        binary_path.rename(real_path)
+        wrapper = bin_dir / binary
+        wrapper.rename(bin_dir / f"{binary}.real")
 
         # Create wrapper
-        create_wrapper_script(binary, moon_home)
+        try:
+            if not shared_written:
+                _write_wrapper(shared_wrapper)
+                shared_written = True
+            os.link(shared_wrapper, wrapper)
+        except OSError:
+            try:
+                _write_wrapper(wrapper)
+            except Exception as e:
+                console.print(f"[red]Error creating wrapper for {binary}: {e}[/red]")
 
     console.print("[green]Wrapper scripts created successfully[/green]")
@@ -1,22 +1,33 @@
 """Version management for MoonBit toolchain."""
 
+import functools
+import hashlib
 import json
-from datetime import datetime
+import os
+import re
+import time
+from collections import deque
+from datetime import date, datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
-from dataclasses import dataclass, asdict
-from rich.console import Console
-from rich.table import Table
+from typing import List, Optional, Dict, Set, Tuple
+from dataclasses import dataclass
 
-import requests
-
-from .utils import get_config_dir
+from .utils import get_config_dir, get_cache_dir, get_session, HTTP_TIMEOUT, _write_atomic
 from .config import load_config
+from ._console import console
+
+
+# How long a fetched index is reused within one process, in seconds
+INDEX_TTL = 300
 
-console = Console()
+# Release date in the last component of a version, e.g. 0.1.20241223+62b9a1a85
+VERSION_DATE_RE = re.compile(r"\.(\d{4})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])(?:\+|$)")
 
+# Local ISO timestamp with seconds, as written by datetime.isoformat()
+ISO_SECONDS_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class VersionInfo:
     """Information about an installed MoonBit version."""
     version: str
@@ -24,7 +35,7 @@ class VersionInfo:
     backup_path: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AvailableVersion:
     """Information about an available MoonBit version."""
     version: str
@@ -33,51 +44,116 @@ class AvailableVersion:
     last_modified: Optional[str] = None
 
 
+def _format_installed_at(installed_at: str) -> str:
+    """Format an ISO install timestamp as 'YYYY-MM-DD HH:MM:SS'.
+
+    Timestamps written by add_version are sliced directly; anything else
+    falls back to parsing.
+    """
+    if ISO_SECONDS_RE.match(installed_at):
+        return f"{installed_at[:10]} {installed_at[11:19]}"
+    return datetime.fromisoformat(installed_at).strftime("%Y-%m-%d %H:%M:%S")
+
+
 class VersionManager:
     """Manages MoonBit version history and rollbacks."""
 
+    # History files known to exist; a file is never removed once created,
+    # so later instances skip the existence check
+    _ensured_files: Set[Path] = set()
+
     def __init__(self):
         self.config_dir = get_config_dir()
-        self.history_file = self.config_dir / "version_history.json"
+        self.history_file = self.config_dir / "version_history.jsonl"
+        # Parsed history, loaded on first use and kept in step with add_version
+        self._history: Optional[List[VersionInfo]] = None
         self._ensure_history_file()
 
     def _ensure_history_file(self) -> None:
-        """Ensure the history file exists."""
-        if not self.history_file.exists():
-            self.history_file.write_text(json.dumps({"versions": []}, indent=2))
+        """Ensure the history file exists, migrating the old JSON history once."""
+        if self.history_file in self._ensured_files:
+            return
+        if self.history_file.exists():
+            self._ensured_files.add(self.history_file)
+            return
 
-    def _load_history(self) -> Dict:
-        """Load the version history."""
+        legacy_file = self.config_dir / "version_history.json"
+        versions = []
         try:
-            return json.loads(self.history_file.read_text())
-        except Exception:
-            return {"versions": []}
-
-    def _save_history(self, history: Dict) -> None:
-        """Save the version history."""
-        self.history_file.write_text(json.dumps(history, indent=2))
+            versions = json.loads(legacy_file.read_bytes())["versions"]
+        except FileNotFoundError:
+            legacy_file = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep the unreadable history for manual recovery rather than
+            # dropping every rollback target
+            backup_file = legacy_file.with_name(legacy_file.name + ".bak")
+            try:
+                os.replace(legacy_file, backup_file)
+            except OSError:
+                backup_file = legacy_file
+            console.print(
+                f"[yellow]Warning: Could not migrate version history ({e}); "
+                f"kept it at {backup_file}[/yellow]"
+            )
+            legacy_file = None
+
+        lines = "".join(json.dumps(v, separators=(",", ":")) + "\n" for v in versions)
+        _write_atomic(self.history_file, lines.encode())
+        if legacy_file is not None:
+            legacy_file.unlink()
+        self._ensured_files.add(self.history_file)
+
+    @staticmethod
+    def _parse_entries(lines) -> List[VersionInfo]:
+        """Parse history lines, skipping blank or truncated ones."""
+        entries = []
+        for line in lines:
+            try:
+                entries.append(VersionInfo(**json.loads(line)))
+            except (ValueError, TypeError):
+                continue
+        return entries
 
     def add_version(self, version: str, backup_path: Optional[Path] = None) -> None:
         """Add a version to the history."""
-        history = self._load_history()
-
         version_info = VersionInfo(
             version=version,
             installed_at=datetime.now().isoformat(),
             backup_path=str(backup_path) if backup_path else None
         )
 
-        history["versions"].append(asdict(version_info))
-        self._save_history(history)
+        # Appending one line keeps each insert independent of the history size
+        with open(self.history_file, "a", encoding="utf-8") as f:
+            record = {
+                "version": version_info.version,
+                "installed_at": version_info.installed_at,
+                "backup_path": version_info.backup_path,
+            }
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if self._history is not None:
+            self._history.append(version_info)
 
     def get_history(self) -> List[VersionInfo]:
         """Get the version history."""
-        history = self._load_history()
-        return [VersionInfo(**v) for v in history["versions"]]
+        if self._history is None:
+            try:
+                with open(self.history_file, "rb") as f:
+                    self._history = self._parse_entries(f)
+            except OSError:
+                return []
+        return list(self._history)
 
     def get_previous_version(self) -> Optional[VersionInfo]:
         """Get the previous version info for rollback."""
-        history = self.get_history()
+        if self._history is not None:
+            history = self._history
+        else:
+            try:
+                with open(self.history_file, "rb") as f:
+                    # Only the last two entries matter
+                    history = self._parse_entries(deque(f, maxlen=2))
+            except OSError:
+                return None
         if len(history) < 2:
             return None
         return history[-2]
@@ -90,20 +166,81 @@ class VersionManager:
             console.print("[yellow]No version history found[/yellow]")
             return
 
+        from rich.table import Table
+        from rich.text import Text
+
+        # Fixed column widths let rich skip measuring every cell
         table = Table(title="MoonBit Version History")
-        table.add_column("Version", style="cyan")
-        table.add_column("Installed At", style="green")
-        table.add_column("Backup", style="yellow")
+        table.add_column(
+            "Version", style="cyan", no_wrap=True,
+            width=max(len("Version"), max(len(v.version) for v in history)),
+        )
+        table.add_column("Installed At", style="green", width=len("YYYY-MM-DD HH:MM:SS"), no_wrap=True)
+        table.add_column("Backup", style="yellow", width=len("Backup"), no_wrap=True)
 
         for version_info in history:
-            installed = datetime.fromisoformat(version_info.installed_at)
-            installed_str = installed.strftime("%Y-%m-%d %H:%M:%S")
+            installed_str = _format_installed_at(version_info.installed_at)
             backup = "✓" if version_info.backup_path else "✗"
-            table.add_row(version_info.version, installed_str, backup)
+            table.add_row(Text(version_info.version), Text(installed_str), Text(backup))
 
         console.print(table)
 
 
+def _get_json(url: str) -> Dict:
+    """Fetch a JSON document, memoized in-process for INDEX_TTL seconds."""
+    return _cached_get_json(url, int(time.time() // INDEX_TTL))
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_get_json(url: str, ttl_bucket: int) -> Dict:
+    """
+    Fetch a JSON document over HTTP, reusing an on-disk copy when unchanged.
+
+    The body and its validators (ETag, Last-Modified) are cached per URL in
+    the cache directory. Later requests are conditional (If-None-Match,
+    If-Modified-Since) and a 304 response returns the cached body.
+    Results are also memoized per ttl_bucket, so a run fetches each URL at
+    most once per INDEX_TTL window; long-running callers still see updates.
+    """
+    cache_dir = get_cache_dir()
+    key = hashlib.sha1(url.encode()).hexdigest()
+    body_file = cache_dir / f"{key}.json"
+    meta_file = cache_dir / f"{key}.meta.json"
+
+    headers = {}
+    if body_file.exists():
+        try:
+            meta = json.loads(meta_file.read_bytes())
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = get_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    if response.status_code == 304:
+        return json.loads(body_file.read_bytes())
+    response.raise_for_status()
+    data = response.json()
+
+    # Caching is best effort; an unwritable cache must not fail the fetch
+    meta = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    try:
+        if meta["etag"] or meta["last_modified"]:
+            _write_atomic(body_file, response.content)
+            _write_atomic(meta_file, json.dumps(meta).encode())
+        else:
+            meta_file.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+    return data
+
+
 def fetch_moonbit_binaries_index() -> Optional[Dict]:
     """Fetch the moonbit-binaries index from configured mirror."""
     config = load_config()
@@ -118,13 +255,10 @@ def fetch_moonbit_binaries_index() -> Optional[Dict]:
             if not file_path.exists():
                 console.print(f"[yellow]Warning: Local index file not found: {file_path}[/yellow]")
                 return None
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            return json.loads(file_path.read_bytes())
         else:
             # Handle HTTP/HTTPS URLs
-            response = requests.get(index_url, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return _get_json(index_url)
     except Exception as e:
         console.print(f"[yellow]Warning: Could not fetch version index: {e}[/yellow]")
         return None
@@ -143,9 +277,7 @@ def fetch_moonup_dist_index() -> Optional[Dict]:
     for url in urls:
         try:
             console.print(f"[dim]Fetching nightly channel index: {url}[/dim]")
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
+            data = _get_json(url)
             # Expect channels key with nightly
             if isinstance(data, dict) and "channels" in data:
                 return data
@@ -190,7 +322,11 @@ def list_available_versions(limit: Optional[int] = None) -> List[AvailableVersio
     releases = linux_x64_data.get("releases", [])
     last_modified = linux_x64_data.get("last_modified")
 
-    versions = [
+    # Slice the raw releases first so no objects are built past the limit
+    if limit:
+        releases = releases[:limit]
+
+    return [
         AvailableVersion(
             version=r["version"],
             filename=r["name"],
@@ -200,10 +336,17 @@ def list_available_versions(limit: Optional[int] = None) -> List[AvailableVersio
         for r in releases
     ]
 
-    if limit:
-        versions = versions[:limit]
 
-    return versions
+def _release_date(version: str) -> str:
+    """Return the YYYY-MM-DD release date in a version string, or "Unknown"."""
+    match = VERSION_DATE_RE.search(version)
+    if not match:
+        return "Unknown"
+    try:
+        # The regex bounds month and day; this rejects dates like Feb 31
+        return date(*map(int, match.groups())).isoformat()
+    except ValueError:
+        return "Unknown"
 
 
 def fetch_available_versions(show_all: bool = False) -> None:
@@ -224,45 +367,48 @@ def fetch_available_versions(show_all: bool = False) -> None:
         return
 
     # Create table
+    from rich.table import Table
+    from rich.text import Text
+
+    # Fixed column widths let rich skip measuring every cell, and plain Text
+    # cells skip markup parsing
     table = Table(title=f"{'All' if show_all else 'Recent'} Linux x86-64 Releases")
-    table.add_column("#", style="dim", width=4)
-    table.add_column("Version", style="cyan")
-    table.add_column("Release Date", style="green")
+    table.add_column("#", style="dim", width=max(4, len(str(len(versions)))), no_wrap=True)
+    table.add_column(
+        "Version", style="cyan", no_wrap=True,
+        width=max(len("Version"), max(len(ver.version) for ver in versions)),
+    )
+    table.add_column("Release Date", style="green", width=len("Release Date"), no_wrap=True)
 
     for idx, ver in enumerate(versions, 1):
         # Extract date from version string (format: 0.1.YYYYMMDD+hash)
-        version_parts = ver.version.split("+")
-        version_base = version_parts[0]
-        date_part = version_base.split(".")[-1] if "." in version_base else ""
-
-        # Try to parse date
-        try:
-            if len(date_part) == 8 and date_part.isdigit():
-                date_obj = datetime.strptime(date_part, "%Y%m%d")
-                date_str = date_obj.strftime("%Y-%m-%d")
-            else:
-                date_str = "Unknown"
-        except:
-            date_str = "Unknown"
+        date_str = _release_date(ver.version)
 
-        table.add_row(str(idx), ver.version, date_str)
+        table.add_row(Text(str(idx)), Text(ver.version), Text(date_str))
 
     console.print(table)
 
+    # The footer is rendered in one print rather than one per line
+    lines = []
     if not show_all and len(versions) == 20:
-        console.print("\n[dim]Showing 20 most recent versions. Use --all flag to see all versions.[/dim]")
+        lines.append("\n[dim]Showing 20 most recent versions. Use --all flag to see all versions.[/dim]")
 
-    console.print(f"\n[green]Total available versions:[/green] {len(versions)}")
-    console.print("\n[cyan]Usage:[/cyan]")
-    console.print("  moonbit-up update <version>  # Install specific version")
-    console.print("  moonbit-up update latest     # Install most recent version")
+    lines.append(f"\n[green]Total available versions:[/green] {len(versions)}")
+    lines.append("\n[cyan]Usage:[/cyan]")
+    lines.append("  moonbit-up update <version>  # Install specific version")
+    lines.append("  moonbit-up update latest     # Install most recent version")
 
-    # Show locally installed versions
-    manager = VersionManager()
-    history = manager.get_history()
+    # Show locally installed versions. First-time users have no history
+    # file, so skip creating one just to find it empty.
+    config_dir = get_config_dir()
+    history = []
+    if (config_dir / "version_history.jsonl").exists() or (config_dir / "version_history.json").exists():
+        history = VersionManager().get_history()
 
     if history:
-        console.print("\n[cyan]Previously Installed Versions:[/cyan]")
+        lines.append("\n[cyan]Previously Installed Versions:[/cyan]")
         for v in history:
-            installed = datetime.fromisoformat(v.installed_at).strftime("%Y-%m-%d %H:%M")
-            console.print(f"  • {v.version} (installed {installed})")
+            installed = _format_installed_at(v.installed_at)[:16]
+            lines.append(f"  • {v.version} (installed {installed})")
+
+    console.print("\n".join(lines))
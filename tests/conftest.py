@@ -12,6 +12,19 @@ def temp_dir(tmp_path):
     return tmp_path
 
 
+@pytest.fixture(autouse=True)
+def isolated_http_cache(tmp_path_factory, monkeypatch):
+    """Keep the HTTP index and probe caches out of the real home directory."""
+    from moonbit_up.version import _cached_get_json
+
+    cache_dir = tmp_path_factory.mktemp("http-cache")
+    monkeypatch.setattr("moonbit_up.version.get_cache_dir", lambda: cache_dir)
+    monkeypatch.setattr("moonbit_up.utils.get_cache_dir", lambda: cache_dir)
+    _cached_get_json.cache_clear()
+    yield cache_dir
+    _cached_get_json.cache_clear()
+
+
 @pytest.fixture
 def mock_console(monkeypatch):
     """Mock the Rich console to capture output."""
@@ -26,5 +39,6 @@ def mock_console(monkeypatch):
     monkeypatch.setattr("moonbit_up.version.console", console)
     monkeypatch.setattr("moonbit_up.mirror.console", console)
     monkeypatch.setattr("moonbit_up.installer.console", console)
+    monkeypatch.setattr("moonbit_up.utils.console", console)
 
     return output
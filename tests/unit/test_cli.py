@@ -0,0 +1,124 @@
+"""Unit tests for CLI module."""
+
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from moonbit_up import __version__
+from moonbit_up.__main__ import main
+from moonbit_up.cli import app
+
+
+runner = CliRunner()
+
+
+def loaded_modules_after(code):
+    """Run code in a fresh interpreter and return the set of loaded modules."""
+    script = f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestLazyImports:
+    """Tests that the CLI defers heavy imports until a command runs."""
+
+    def test_import_does_not_load_command_modules(self):
+        """Test that importing the CLI skips requests and command modules."""
+        modules = loaded_modules_after("import moonbit_up.cli")
+
+        assert "moonbit_up.cli" in modules
+        for name in (
+            "requests",
+            "tarfile",
+            "rich.progress",
+            "rich.console",
+            "moonbit_up.installer",
+            "moonbit_up.version",
+            "moonbit_up.mirror",
+        ):
+            assert name not in modules, f"{name} imported eagerly"
+
+    def test_command_modules_defer_rendering_and_process_imports(self):
+        """Test that command modules load tables, progress bars and subprocess on use."""
+        modules = loaded_modules_after(
+            "import moonbit_up.version, moonbit_up.mirror, moonbit_up.utils"
+        )
+
+        for name in ("rich.table", "rich.progress", "subprocess", "concurrent.futures"):
+            assert name not in modules, f"{name} imported eagerly"
+
+    def test_installer_construction_does_not_load_network_stack(self):
+        """Test that creating a MoonBitInstaller defers requests and tarfile."""
+        modules = loaded_modules_after(
+            "from moonbit_up.installer import MoonBitInstaller\n"
+            "MoonBitInstaller()"
+        )
+
+        assert "requests" not in modules
+        assert "tarfile" not in modules
+        assert "moonbit_up._installer" not in modules
+
+
+class TestVersionOption:
+    """Tests for the --version option."""
+
+    def test_version_option(self):
+        """Test that --version prints the package version."""
+        result = runner.invoke(app, ["--version"])
+
+        assert result.exit_code == 0
+        assert f"moonbit-up version {__version__}" in result.output
+
+    def test_version_fast_path_skips_typer(self):
+        """Test that the entry point answers --version without loading Typer."""
+        modules = loaded_modules_after(
+            "import sys\n"
+            "sys.argv = ['moonbit-up', '--version']\n"
+            "from moonbit_up.__main__ import main\n"
+            "main()"
+        )
+
+        assert "typer" not in modules
+        assert "moonbit_up.cli" not in modules
+
+    def test_version_fast_path_output(self, monkeypatch, capsys):
+        """Test that the fast path prints the same text as the Typer option."""
+        monkeypatch.setattr("sys.argv", ["moonbit-up", "-v"])
+
+        main()
+
+        assert capsys.readouterr().out == f"moonbit-up version {__version__}\n"
+
+
+class TestSubcommandDispatch:
+    """Tests for registering only the invoked subcommand."""
+
+    def test_only_invoked_command_is_registered(self, monkeypatch):
+        """Test that the entry point registers just the named subcommand."""
+        monkeypatch.setattr(app, "registered_commands", list(app.registered_commands))
+        monkeypatch.setattr("sys.argv", ["moonbit-up", "list", "--help"])
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code == 0
+        assert [info.name for info in app.registered_commands] == ["list"]
+
+    def test_unknown_command_keeps_all_commands(self, monkeypatch):
+        """Test that an unknown subcommand leaves every command registered."""
+        monkeypatch.setattr(app, "registered_commands", list(app.registered_commands))
+        monkeypatch.setattr("sys.argv", ["moonbit-up", "bogus"])
+        count = len(app.registered_commands)
+
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+
+        assert exc_info.value.code != 0
+        assert len(app.registered_commands) == count
@@ -92,6 +92,25 @@ index_url = "https://custom.com/index.json"
         # Should use default for download_base_url
         assert config.mirror.download_base_url is not None
 
+    def test_load_config_returns_independent_copies(self, temp_config_dir):
+        """Test that mutating a loaded config does not affect later loads."""
+        set_mirror(index_url="https://custom.com/index.json")
+
+        config = load_config()
+        config.mirror.index_url = "https://mutated.com/index.json"
+
+        assert load_config().mirror.index_url == "https://custom.com/index.json"
+
+    def test_load_config_sees_external_changes(self, temp_config_dir):
+        """Test that the cached config is refreshed when the file changes."""
+        config_file = temp_config_dir / "config.toml"
+        set_mirror(index_url="https://first.com/index.json")
+        assert load_config().mirror.index_url == "https://first.com/index.json"
+
+        config_file.write_text('[mirror]\nindex_url = "https://second-mirror.com/index.json"\n')
+
+        assert load_config().mirror.index_url == "https://second-mirror.com/index.json"
+
 
 class TestSaveConfig:
     """Tests for save_config function."""
@@ -120,6 +139,14 @@ class TestSaveConfig:
         assert "old content" not in content
         assert "[mirror]" in content
 
+    def test_save_config_round_trips_special_characters(self, temp_config_dir):
+        """Test that quotes and backslashes in URLs survive save and load."""
+        config = load_config()
+        config.mirror.index_url = 'https://example.com/a"b\\c/index.json'
+        save_config(config)
+
+        assert load_config().mirror.index_url == 'https://example.com/a"b\\c/index.json'
+
 
 class TestSetMirror:
     """Tests for set_mirror function."""
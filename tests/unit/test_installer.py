@@ -0,0 +1,259 @@
+"""Unit tests for installer module."""
+
+import hashlib
+import io
+import os
+import shutil
+import stat
+import tarfile
+from unittest.mock import Mock
+
+import pytest
+import responses
+
+from moonbit_up import utils
+from moonbit_up.installer import MoonBitInstaller
+
+
+def build_toolchain_archive():
+    """Build an in-memory toolchain archive with bin/ and lib/ entries."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content, mode in (
+            ("bin/moon", b"#!/bin/sh\necho moon\n", 0o644),
+            ("lib/core/README", b"core\n", 0o644),
+            ("docs/ignored.txt", b"not installed\n", 0o644),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = mode
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def installer(tmp_path):
+    """Installer pointed at a temporary moon home."""
+    installer = MoonBitInstaller()
+    installer.moon_home = tmp_path / "moon_home"
+    return installer
+
+
+class TestDownloadAndExtract:
+    """Tests for download_and_extract method."""
+
+    @responses.activate
+    def test_streams_archive_into_moon_home(self, installer, mock_console):
+        """Test that an HTTP archive is extracted without a temporary tarball."""
+        url = "https://example.com/moonbit.tar.gz"
+        responses.add(responses.GET, url, body=build_toolchain_archive(), status=200)
+
+        assert installer.download_and_extract(url, installer.moon_home)
+
+        moon = installer.moon_home / "bin" / "moon"
+        assert moon.exists()
+        assert moon.stat().st_mode & stat.S_IXUSR
+        assert (installer.moon_home / "lib" / "core" / "README").exists()
+        assert not (installer.moon_home / "docs").exists()
+        # Only moon_home is left next to it; the staging directory is removed
+        assert [p.name for p in installer.moon_home.parent.iterdir()] == ["moon_home"]
+
+    def test_extracts_file_url(self, installer, tmp_path, mock_console):
+        """Test that file:// URLs are extracted directly from the source file."""
+        archive = tmp_path / "moonbit.tar.gz"
+        archive.write_bytes(build_toolchain_archive())
+
+        assert installer.download_and_extract(f"file://{archive}", installer.moon_home)
+        assert (installer.moon_home / "bin" / "moon").exists()
+
+    @responses.activate
+    def test_http_error(self, installer, mock_console):
+        """Test that HTTP errors are reported and leave moon home untouched."""
+        url = "https://example.com/missing.tar.gz"
+        responses.add(responses.GET, url, status=404)
+
+        assert not installer.download_and_extract(url, installer.moon_home)
+        assert not (installer.moon_home / "bin").exists()
+        assert "Error downloading toolchain" in mock_console.getvalue()
+
+    @responses.activate
+    def test_verifies_checksum_while_streaming(self, installer, mock_console):
+        """Test that a matching SHA-256 is accepted."""
+        archive = build_toolchain_archive()
+        url = "https://example.com/moonbit.tar.gz"
+        responses.add(responses.GET, url, body=archive, status=200)
+
+        sha256 = hashlib.sha256(archive).hexdigest()
+        assert installer.download_and_extract(url, installer.moon_home, sha256)
+        assert (installer.moon_home / "bin" / "moon").exists()
+
+    @responses.activate
+    def test_checksum_mismatch_installs_nothing(self, installer, mock_console):
+        """Test that a SHA-256 mismatch aborts before touching moon home."""
+        url = "https://example.com/moonbit.tar.gz"
+        responses.add(responses.GET, url, body=build_toolchain_archive(), status=200)
+
+        assert not installer.download_and_extract(url, installer.moon_home, "0" * 64)
+        assert not (installer.moon_home / "bin").exists()
+        assert "Checksum mismatch" in mock_console.getvalue()
+
+
+class TestInstall:
+    """Tests for install method."""
+
+    def test_pinned_current_version_skips_resolution(self, installer, monkeypatch, mock_console):
+        """Test that installing the current version needs no index lookup."""
+        monkeypatch.setattr(
+            "moonbit_up._installer.get_current_version",
+            lambda: "0.1.20241223+62b9a1a85"
+        )
+
+        def fail_resolve(version):
+            raise AssertionError("resolve_release should not be called")
+
+        monkeypatch.setattr(installer, "resolve_release", fail_resolve)
+
+        assert installer.install(version="0.1.20241223+62b9a1a85")
+        assert "Already at target version" in mock_console.getvalue()
+
+
+class TestInstallUpdate:
+    """Tests for updating an existing installation."""
+
+    @pytest.fixture
+    def existing_home(self, installer, tmp_path, monkeypatch):
+        """An installed moon home with credentials and a toolchain archive to update to."""
+        (installer.moon_home / "bin").mkdir(parents=True)
+        (installer.moon_home / "bin" / "moon").write_text("old moon")
+        (installer.moon_home / "credentials.json").write_text('{"token": "x"}')
+        archive = tmp_path / "moonbit.tar.gz"
+        archive.write_bytes(build_toolchain_archive())
+
+        versions = iter(["0.1.20241218+f4a066f5f", "0.1.20241223+62b9a1a85"])
+        monkeypatch.setenv("MOON_HOME", str(installer.moon_home))
+        monkeypatch.setattr("moonbit_up._installer.get_current_version", lambda: next(versions))
+        monkeypatch.setattr("moonbit_up._installer.ensure_amd64_libs", lambda: True)
+        monkeypatch.setattr(
+            installer, "resolve_release",
+            lambda version: (f"file://{archive}", "0.1.20241223+62b9a1a85", None)
+        )
+        monkeypatch.setattr(installer, "verify_installation", lambda: True)
+        monkeypatch.setattr(installer, "version_manager", Mock())
+        # Take the hardlink backup path rather than a copy-on-write clone
+        monkeypatch.setattr("platform.system", lambda: "Darwin")
+        monkeypatch.setattr(utils, "_backup_strategy", None)
+        return installer.moon_home
+
+    def test_update_keeps_backup_credentials_separate(self, installer, existing_home, mock_console):
+        """Test that the backup gets its own credentials file."""
+        assert installer.install()
+
+        backup = installer.version_manager.add_version.call_args.args[1]
+        creds = existing_home / "credentials.json"
+        assert creds.stat().st_ino != (backup / "credentials.json").stat().st_ino
+        creds.write_text('{"token": "y"}')
+        assert (backup / "credentials.json").read_text() == '{"token": "x"}'
+        assert (existing_home / "bin" / "moon.real").exists()
+
+    def test_update_with_fully_hardlinked_backup(self, installer, existing_home, monkeypatch, mock_console):
+        """Test that a backup sharing every inode with moon home does not abort the update."""
+        def hardlink_backup():
+            backup = existing_home.parent / ".moon.backup.linked"
+            shutil.copytree(existing_home, backup, copy_function=os.link)
+            return backup
+
+        monkeypatch.setattr("moonbit_up._installer.backup_moon_home", hardlink_backup)
+
+        assert installer.install()
+
+        assert (existing_home / "credentials.json").read_text() == '{"token": "x"}'
+        assert (existing_home / "bin" / "moon.real").exists()
+        installer.version_manager.add_version.assert_called_once()
+
+
+class TestPreserveUserData:
+    """Tests for preserve_user_data method."""
+
+    def test_user_data_is_copied_from_backup(self, installer, tmp_path, mock_console):
+        """Test that preserved registry and core files do not share inodes with the backup."""
+        backup = tmp_path / "backup"
+        for name in ("registry/cache/pkg.json", "lib/core/core.mi"):
+            (backup / name).parent.mkdir(parents=True)
+            (backup / name).write_text("{}")
+        (backup / "credentials.json").write_text('{"token": "x"}')
+        installer.moon_home.mkdir()
+
+        installer.preserve_user_data(backup)
+
+        for name in ("registry/cache/pkg.json", "lib/core/core.mi"):
+            preserved = installer.moon_home / name
+            assert preserved.read_text() == "{}"
+            assert preserved.stat().st_ino != (backup / name).stat().st_ino
+        assert (installer.moon_home / "credentials.json").read_text() == '{"token": "x"}'
+
+    def test_credentials_hardlinked_into_backup(self, installer, tmp_path, mock_console):
+        """Test that a backup sharing the live credentials file is handled."""
+        installer.moon_home.mkdir()
+        creds = installer.moon_home / "credentials.json"
+        creds.write_text('{"token": "x"}')
+        backup = tmp_path / "backup"
+        backup.mkdir()
+        os.link(creds, backup / "credentials.json")
+
+        installer.preserve_user_data(backup)
+
+        assert creds.read_text() == '{"token": "x"}'
+        assert creds.stat().st_ino != (backup / "credentials.json").stat().st_ino
+
+
+class TestRollback:
+    """Tests for rollback method."""
+
+    def test_rollback_swaps_in_backup(self, installer, tmp_path, monkeypatch, mock_console):
+        """Test that rollback replaces moon home with the backup contents."""
+        backup = tmp_path / "backup"
+        (backup / "bin").mkdir(parents=True)
+        (backup / "bin" / "moon").write_text("old")
+        (installer.moon_home / "bin").mkdir(parents=True)
+        (installer.moon_home / "bin" / "moon").write_text("new")
+        (installer.moon_home / "stale").write_text("remove me")
+
+        previous = Mock(version="0.1.20241218+f4a066f5f", backup_path=str(backup))
+        monkeypatch.setattr(
+            installer, "version_manager", Mock(get_previous_version=lambda: previous)
+        )
+        monkeypatch.setattr(installer, "verify_installation", lambda: True)
+
+        assert installer.rollback()
+
+        assert (installer.moon_home / "bin" / "moon").read_text() == "old"
+        assert not (installer.moon_home / "stale").exists()
+        # The backup is kept and no staging directories are left behind
+        assert (backup / "bin" / "moon").exists()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["backup", "moon_home"]
+
+    def test_rollback_copies_user_data(self, installer, tmp_path, monkeypatch, mock_console):
+        """Test that restored user data does not share inodes with the backup."""
+        backup = tmp_path / "backup"
+        (backup / "bin").mkdir(parents=True)
+        (backup / "bin" / "moon").write_text("old")
+        (backup / "registry").mkdir()
+        (backup / "registry" / "index.json").write_text("{}")
+        (backup / "lib" / "core").mkdir(parents=True)
+        (backup / "lib" / "core" / "core.mi").write_text("core")
+        (backup / "credentials.json").write_text('{"token": "x"}')
+
+        previous = Mock(version="0.1.20241218+f4a066f5f", backup_path=str(backup))
+        monkeypatch.setattr(
+            installer, "version_manager", Mock(get_previous_version=lambda: previous)
+        )
+        monkeypatch.setattr(installer, "verify_installation", lambda: True)
+
+        assert installer.rollback()
+
+        moon_home = installer.moon_home
+        assert (moon_home / "bin" / "moon").stat().st_ino == (backup / "bin" / "moon").stat().st_ino
+        for name in ("credentials.json", "registry/index.json", "lib/core/core.mi"):
+            assert (moon_home / name).stat().st_ino != (backup / name).stat().st_ino
+        (moon_home / "credentials.json").write_text('{"token": "y"}')
+        assert (backup / "credentials.json").read_text() == '{"token": "x"}'
@@ -1,12 +1,18 @@
 """Unit tests for mirror module."""
 
+import hashlib
 import json
+import stat
+import threading
+import urllib.request
 import pytest
 import responses
+from dataclasses import replace
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
-from moonbit_up.mirror import MirrorManager
+from moonbit_up import utils
+from moonbit_up.mirror import MirrorManager, _mirror_request_handler
 from moonbit_up.version import AvailableVersion
 
 
@@ -82,8 +88,7 @@ class TestCreateMirror:
         assert manager.index_file.exists()
 
         # Check index content
-        with open(manager.index_file) as f:
-            index = json.load(f)
+        index = json.loads(manager.index_file.read_bytes())
 
         assert "linux-x64" in index
         assert len(index["linux-x64"]["releases"]) == 1
@@ -116,8 +121,7 @@ class TestCreateMirror:
         assert result is True
 
         # Check index has all versions
-        with open(manager.index_file) as f:
-            index = json.load(f)
+        index = json.loads(manager.index_file.read_bytes())
 
         assert len(index["linux-x64"]["releases"]) == 2
 
@@ -146,8 +150,7 @@ class TestCreateMirror:
 
         assert result is True
 
-        with open(manager.index_file) as f:
-            index = json.load(f)
+        index = json.loads(manager.index_file.read_bytes())
 
         assert len(index["linux-x64"]["releases"]) == 1
         assert index["linux-x64"]["releases"][0]["version"] == "0.1.20241218+f4a066f5f"
@@ -190,6 +193,66 @@ class TestCreateMirror:
         # Check that existing file wasn't overwritten
         assert binary_path.read_bytes() == b"existing content"
 
+    @responses.activate
+    def test_create_mirror_failed_download_leaves_no_file(self, temp_mirror_dir, sample_versions, monkeypatch):
+        """Test that a failed concurrent download does not leave a partial binary."""
+        mock_config = Mock()
+        mock_config.mirror.download_base_url = "https://example.com/releases"
+        monkeypatch.setattr("moonbit_up.mirror.load_config", lambda: mock_config)
+
+        good, bad = sample_versions
+        body = b"fake tarball content"
+        good = replace(good, sha256=hashlib.sha256(body).hexdigest())
+        monkeypatch.setattr(
+            "moonbit_up.mirror.list_available_versions",
+            lambda: [good, bad]
+        )
+        responses.add(
+            responses.GET,
+            f"https://example.com/releases/v{good.version}/{good.filename}",
+            body=body,
+            status=200
+        )
+        responses.add(
+            responses.GET,
+            f"https://example.com/releases/v{bad.version}/{bad.filename}",
+            status=404
+        )
+
+        manager = MirrorManager(temp_mirror_dir)
+        result = manager.create_mirror(all_versions=True)
+
+        assert result is True
+        assert (manager.releases_dir / f"v{good.version}" / good.filename).read_bytes() == body
+        bad_dir = manager.releases_dir / f"v{bad.version}"
+        assert list(bad_dir.iterdir()) == []
+
+    @responses.activate
+    def test_create_mirror_rejects_checksum_mismatch(self, temp_mirror_dir, sample_versions, monkeypatch, mock_console):
+        """Test that a download not matching its SHA-256 is discarded."""
+        ver = sample_versions[0]
+        monkeypatch.setattr(
+            "moonbit_up.mirror.list_available_versions",
+            lambda: [ver]
+        )
+
+        mock_config = Mock()
+        mock_config.mirror.download_base_url = "https://example.com/releases"
+        monkeypatch.setattr("moonbit_up.mirror.load_config", lambda: mock_config)
+
+        responses.add(
+            responses.GET,
+            f"https://example.com/releases/v{ver.version}/{ver.filename}",
+            body=b"tampered content",
+            status=200
+        )
+
+        manager = MirrorManager(temp_mirror_dir)
+        manager.create_mirror()
+
+        assert list((manager.releases_dir / f"v{ver.version}").iterdir()) == []
+        assert "Checksum mismatch" in mock_console.getvalue()
+
 
 class TestSyncMirror:
     """Tests for sync_mirror method."""
@@ -278,11 +341,40 @@ class TestSyncMirror:
         assert result is True
 
         # Check that index was updated
-        with open(manager.index_file) as f:
-            index = json.load(f)
+        index = json.loads(manager.index_file.read_bytes())
 
         assert len(index["linux-x64"]["releases"]) == 2
 
+    @responses.activate
+    def test_sync_mirror_skips_existing_binaries(self, temp_mirror_dir, sample_versions, monkeypatch, mock_console):
+        """Test that sync does not download binaries already on disk."""
+        manager = MirrorManager(temp_mirror_dir)
+        manager.releases_dir.mkdir(parents=True)
+        manager.index_file.write_text(json.dumps({
+            "linux-x64": {"last_modified": "2024-12-18T10:00:00", "releases": []}
+        }))
+
+        # Left behind by a sync that was interrupted before the index update
+        binary_path = manager.releases_dir / f"v{sample_versions[0].version}" / sample_versions[0].filename
+        binary_path.parent.mkdir()
+        binary_path.write_bytes(b"existing content")
+
+        monkeypatch.setattr(
+            "moonbit_up.mirror.list_available_versions",
+            lambda: sample_versions[:1]
+        )
+        mock_config = Mock()
+        mock_config.mirror.download_base_url = "https://example.com/releases"
+        monkeypatch.setattr("moonbit_up.mirror.load_config", lambda: mock_config)
+
+        assert manager.sync_mirror() is True
+
+        assert len(responses.calls) == 0
+        assert binary_path.read_bytes() == b"existing content"
+        assert "Skipping" in mock_console.getvalue()
+        index = json.loads(manager.index_file.read_bytes())
+        assert [r["version"] for r in index["linux-x64"]["releases"]] == [sample_versions[0].version]
+
 
 class TestInfo:
     """Tests for info method."""
@@ -325,6 +417,66 @@ class TestInfo:
         assert "Mirror Information" in captured.out
         assert "Versions:" in captured.out
         assert "2" in captured.out  # Should show 2 versions
+        assert "Disk Usage:   1.0 MB" in captured.out
+
+
+class TestServeMirror:
+    """Tests for the mirror HTTP request handler."""
+
+    def test_serves_mirror_files_concurrently(self, temp_mirror_dir):
+        """Test that serve_mirror handles requests in parallel."""
+        import http.server
+        from concurrent.futures import ThreadPoolExecutor
+
+        temp_mirror_dir.mkdir(parents=True)
+        (temp_mirror_dir / "index.json").write_bytes(b"{}")
+        (temp_mirror_dir / "moonbit.tar.gz").write_bytes(b"x" * 1024)
+
+        # Each request blocks until the other one has arrived, which only
+        # happens if the server handles them at the same time.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_handler(directory):
+            handler = _mirror_request_handler(directory)
+
+            class BlockingHandler(handler.func):
+                def do_GET(self):
+                    barrier.wait()
+                    super().do_GET()
+
+            return lambda *args, **kwargs: BlockingHandler(*args, **handler.keywords, **kwargs)
+
+        servers = []
+        started = threading.Event()
+
+        class RecordingServer(http.server.ThreadingHTTPServer):
+            def service_actions(self):
+                if not servers:
+                    servers.append(self)
+                    started.set()
+
+        manager = MirrorManager(temp_mirror_dir)
+        with patch("moonbit_up.mirror._mirror_request_handler", blocking_handler), \
+                patch.object(http.server, "ThreadingHTTPServer", RecordingServer):
+            thread = threading.Thread(target=manager.serve_mirror, kwargs={"port": 0}, daemon=True)
+            thread.start()
+            assert started.wait(timeout=5)
+            server = servers[0]
+            try:
+                base = f"http://127.0.0.1:{server.server_address[1]}"
+
+                def fetch(name):
+                    with urllib.request.urlopen(f"{base}/{name}", timeout=10) as response:
+                        return response.read()
+
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    results = list(pool.map(fetch, ["index.json", "moonbit.tar.gz"]))
+            finally:
+                server.shutdown()
+                thread.join(timeout=5)
+
+        assert results == [b"{}", b"x" * 1024]
+        assert not barrier.broken
 
 
 class TestCreateIndex:
@@ -339,8 +491,7 @@ class TestCreateIndex:
 
         assert manager.index_file.exists()
 
-        with open(manager.index_file) as f:
-            index = json.load(f)
+        index = json.loads(manager.index_file.read_bytes())
 
         assert "linux-x64" in index
         assert "last_modified" in index["linux-x64"]
@@ -352,3 +503,17 @@ class TestCreateIndex:
         assert releases[0]["version"] == sample_versions[0].version
         assert releases[0]["name"] == sample_versions[0].filename
         assert releases[0]["sha256"] == sample_versions[0].sha256
+
+    def test_create_index_uses_umask_mode(self, temp_mirror_dir, sample_versions, monkeypatch):
+        """Test that the index is world-readable like the binaries next to it."""
+        manager = MirrorManager(temp_mirror_dir)
+        manager.mirror_path.mkdir(parents=True)
+        monkeypatch.setattr(utils, "_umask", lambda: 0o022)
+
+        manager._create_index(sample_versions)
+        assert stat.S_IMODE(manager.index_file.stat().st_mode) == 0o644
+
+        # Rewriting keeps whatever mode the existing index has
+        manager.index_file.chmod(0o640)
+        manager._create_index(sample_versions)
+        assert stat.S_IMODE(manager.index_file.stat().st_mode) == 0o640
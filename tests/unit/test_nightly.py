@@ -1,3 +1,4 @@
+import json
 import os
 import stat
 import tarfile
@@ -8,6 +9,7 @@ import pytest
 import responses
 
 from moonbit_up.version import get_latest_for_channel
+from moonbit_up import utils
 from moonbit_up import version as version_module
 from moonbit_up.utils import candidate_asset_names_for_triple, detect_target_triple, probe_first_existing_asset
 from moonbit_up.installer import MoonBitInstaller
@@ -57,6 +59,52 @@ def test_probe_first_existing_asset_redirect_and_success():
     assert resolved == url
 
 
+@responses.activate
+def test_probe_prefers_earliest_candidate_and_caches_result():
+    base = "https://github.com/chawyehsu/moonbit-dist-nightly/releases/download"
+    tag = "nightly-2025-11-13"
+    candidates = candidate_asset_names_for_triple("x86_64-unknown-linux", date="2025-11-13")
+    responses.add(responses.HEAD, f"{base}/{tag}/{candidates[0]}", status=404)
+    for name in set(candidates) - {candidates[0]}:
+        responses.add(responses.HEAD, f"{base}/{tag}/{name}", status=200)
+
+    expected = f"{base}/{tag}/{candidates[1]}"
+    assert probe_first_existing_asset(base, tag, candidates) == expected
+
+    # A second probe is answered from the on-disk cache
+    calls = len(responses.calls)
+    assert probe_first_existing_asset(base, tag, candidates) == expected
+    assert len(responses.calls) == calls
+
+
+@responses.activate
+def test_probe_does_not_cache_missing_asset():
+    base = "https://github.com/chawyehsu/moonbit-dist-nightly/releases/download"
+    tag = "nightly-2025-11-13"
+    candidates = ("moonbit-linux-x86_64.tar.gz",)
+    url = f"{base}/{tag}/{candidates[0]}"
+    responses.add(responses.HEAD, url, status=404)
+    assert probe_first_existing_asset(base, tag, candidates) is None
+
+    # Once the asset is published the next probe finds it
+    responses.replace(responses.HEAD, url, status=200)
+    assert probe_first_existing_asset(base, tag, candidates) == url
+
+
+@responses.activate
+def test_probe_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(utils, "PROBE_CACHE_MAX_ENTRIES", 2)
+    base = "https://example.com/releases/download"
+    for tag in ("a", "b", "c"):
+        responses.add(responses.HEAD, f"{base}/{tag}/asset.tar.gz", status=200)
+        probe_first_existing_asset(base, tag, ("asset.tar.gz",))
+
+    cache = json.loads((utils.get_cache_dir() / utils.PROBE_CACHE_FILE).read_bytes())
+    assert sorted(entry["url"] for entry in cache.values()) == [
+        f"{base}/b/asset.tar.gz", f"{base}/c/asset.tar.gz"
+    ]
+
+
 def create_minimal_tar_with_bin(tmp_path: Path) -> Path:
     tar_path = tmp_path / "toolchain.tar.gz"
     bin_dir = tmp_path / "build" / "bin"
@@ -0,0 +1,170 @@
+"""Unit tests for utils module."""
+
+import os
+
+from moonbit_up import utils
+from moonbit_up.utils import (
+    WRAPPER_SCRIPT,
+    backup_moon_home,
+    ensure_amd64_libs,
+    get_current_version,
+    setup_wrappers,
+)
+
+
+class TestBackupMoonHome:
+    """Tests for backup_moon_home function."""
+
+    def test_backup_hardlinks_files_and_keeps_symlinks(self, tmp_path, monkeypatch, mock_console):
+        """Test that a backup links files instead of copying their contents."""
+        moon_home = tmp_path / ".moon"
+        (moon_home / "bin").mkdir(parents=True)
+        (moon_home / "bin" / "moon").write_text("moon")
+        os.symlink("moon", moon_home / "bin" / "moon-link")
+        (moon_home / "credentials.json").write_text("{}")
+
+        monkeypatch.setenv("MOON_HOME", str(moon_home))
+        # Skip the copy-on-write attempt so the hardlink path is exercised
+        monkeypatch.setattr("platform.system", lambda: "Darwin")
+        monkeypatch.setattr(utils, "_backup_strategy", None)
+
+        backup = backup_moon_home(suffix="test")
+
+        assert backup == tmp_path / ".moon.backup.test"
+        assert (backup / "bin" / "moon").stat().st_ino == (moon_home / "bin" / "moon").stat().st_ino
+        assert os.readlink(backup / "bin" / "moon-link") == "moon"
+        # User data is updated in place, so the backup gets its own copy
+        assert (backup / "credentials.json").read_text() == "{}"
+        assert (backup / "credentials.json").stat().st_ino != (moon_home / "credentials.json").stat().st_ino
+
+    def test_backup_refuses_existing_destination(self, tmp_path, monkeypatch, mock_console):
+        """Test that a second backup with the same name fails instead of nesting."""
+        moon_home = tmp_path / ".moon"
+        (moon_home / "bin").mkdir(parents=True)
+        (moon_home / "bin" / "moon").write_text("moon")
+        existing = tmp_path / ".moon.backup.test"
+        existing.mkdir()
+        monkeypatch.setenv("MOON_HOME", str(moon_home))
+        monkeypatch.setattr("platform.system", lambda: "Linux")
+        monkeypatch.setattr(utils, "_backup_strategy", None)
+
+        assert backup_moon_home(suffix="test") is None
+        assert list(existing.iterdir()) == []
+
+    def test_backup_without_cp_falls_back_to_hardlinks(self, tmp_path, monkeypatch, mock_console):
+        """Test that a missing cp binary still produces a backup."""
+        moon_home = tmp_path / ".moon"
+        (moon_home / "bin").mkdir(parents=True)
+        (moon_home / "bin" / "moon").write_text("moon")
+        monkeypatch.setenv("MOON_HOME", str(moon_home))
+        monkeypatch.setenv("PATH", str(tmp_path / "empty-bin"))
+        monkeypatch.setattr("platform.system", lambda: "Linux")
+        monkeypatch.setattr(utils, "_backup_strategy", None)
+
+        backup = backup_moon_home(suffix="test")
+
+        assert backup == tmp_path / ".moon.backup.test"
+        assert (backup / "bin" / "moon").read_text() == "moon"
+        assert utils._backup_strategy == "hardlink"
+
+    def test_backup_missing_moon_home(self, tmp_path, monkeypatch):
+        """Test that there is nothing to back up without an installation."""
+        monkeypatch.setenv("MOON_HOME", str(tmp_path / "missing"))
+
+        assert backup_moon_home() is None
+
+
+class TestSetupWrappers:
+    """Tests for setup_wrappers function."""
+
+    def test_wraps_present_binaries_once(self, tmp_path, mock_console):
+        """Test that binaries are moved aside and replaced by executable wrappers."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "moon").write_bytes(b"ELF moon")
+        (bin_dir / "moonc").write_bytes(b"ELF moonc")
+
+        setup_wrappers(tmp_path)
+        setup_wrappers(tmp_path)
+
+        for name in ("moon", "moonc"):
+            assert (bin_dir / f"{name}.real").read_bytes() == f"ELF {name}".encode()
+            assert (bin_dir / name).read_bytes() == WRAPPER_SCRIPT
+            assert os.access(bin_dir / name, os.X_OK)
+        assert not (bin_dir / "moonfmt").exists()
+        # Both wrappers are links to one shared script
+        assert (bin_dir / "moon").stat().st_ino == (bin_dir / "moonc").stat().st_ino
+
+
+class TestGetCurrentVersion:
+    """Tests for get_current_version function."""
+
+    def test_version_is_cached_until_binary_changes(self, tmp_path, monkeypatch):
+        """Test that moon version only runs again after the binary changes."""
+        moon_home = tmp_path / ".moon"
+        (moon_home / "bin").mkdir(parents=True)
+        moon = moon_home / "bin" / "moon"
+        calls = tmp_path / "calls"
+        moon.write_text(f'#!/bin/sh\necho x >> "{calls}"\necho "moon 0.1.20251030 (cf54fca)"\n')
+        moon.chmod(0o755)
+        monkeypatch.setenv("MOON_HOME", str(moon_home))
+
+        assert get_current_version() == "0.1.20251030"
+        assert get_current_version() == "0.1.20251030"
+        # A fresh process reads the on-disk cache instead of running moon
+        monkeypatch.setattr(utils, "_current_version_cache", None)
+        assert get_current_version() == "0.1.20251030"
+        assert calls.read_text().count("x") == 1
+
+        moon.write_text(f'#!/bin/sh\necho x >> "{calls}"\necho "moon 0.1.20251105 (abcdef01)"\n')
+        assert get_current_version() == "0.1.20251105"
+        assert calls.read_text().count("x") == 2
+
+    def test_replaced_binary_with_same_mtime_and_size(self, tmp_path, monkeypatch):
+        """Test that a swapped-in binary is detected even with its mtime and size kept."""
+        moon_home = tmp_path / ".moon"
+        (moon_home / "bin").mkdir(parents=True)
+        moon = moon_home / "bin" / "moon"
+        moon.write_text('#!/bin/sh\necho "moon 0.1.20251030 (cf54fca)"\n')
+        moon.chmod(0o755)
+        monkeypatch.setenv("MOON_HOME", str(moon_home))
+
+        assert get_current_version() == "0.1.20251030"
+
+        # Swap in a same-sized binary by rename, restoring the old mtime the
+        # way tar extraction does
+        st = moon.stat()
+        staged = moon_home / "bin" / "moon.new"
+        staged.write_text('#!/bin/sh\necho "moon 0.1.20251105 (abcdef0)"\n')
+        staged.chmod(0o755)
+        os.utime(staged, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(staged, moon)
+        assert moon.stat().st_size == st.st_size
+
+        assert get_current_version() == "0.1.20251105"
+
+
+class TestEnsureAmd64Libs:
+    """Tests for ensure_amd64_libs function."""
+
+    def test_libraries_are_streamed_from_container(self, tmp_path, monkeypatch, mock_console):
+        """Test that the container's tar stream is unpacked into lib/ and lib64/."""
+        image_libs = tmp_path / "image-libs"
+        image_libs.mkdir()
+        (image_libs / "libc.so.6").write_bytes(b"libc")
+        (image_libs / "ld-linux-x86-64.so.2").write_bytes(b"ld.so")
+
+        # A stand-in for docker that writes the tar stream the real command would
+        fake_bin = tmp_path / "fake-bin"
+        fake_bin.mkdir()
+        docker = fake_bin / "docker"
+        docker.write_text(f'#!/bin/sh\nexec tar -cf - -C "{image_libs}" .\n')
+        docker.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{fake_bin}:{os.environ['PATH']}")
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+
+        assert ensure_amd64_libs()
+
+        libs_dir = tmp_path / "home" / "moonbit-amd64-libs"
+        assert (libs_dir / "lib" / "libc.so.6").read_bytes() == b"libc"
+        assert (libs_dir / "lib64" / "ld-linux-x86-64.so.2").read_bytes() == b"ld.so"
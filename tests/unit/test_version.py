@@ -1,33 +1,73 @@
 """Unit tests for version module."""
 
 import json
+from dataclasses import FrozenInstanceError
 import pytest
-import responses
-from datetime import datetime
+import requests
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
 
+import moonbit_up.version as version_module
 from moonbit_up.version import (
     VersionInfo,
     AvailableVersion,
     VersionManager,
+    fetch_available_versions,
     fetch_moonbit_binaries_index,
     list_available_versions,
+    _cached_get_json,
+    INDEX_TTL,
 )
 
 
+class FakeResponse:
+    """Minimal stand-in for a requests response."""
+
+    def __init__(self, json_data, status_code, headers=None):
+        self._json = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(json_data).encode()
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeSession:
+    """Session stub that returns canned responses in order and records requests.
+
+    The last response is repeated once the others are used up.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append((url, headers or {}))
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+
 @pytest.fixture
-def temp_config_dir(tmp_path, monkeypatch):
-    """Create a temporary config directory."""
-    config_dir = tmp_path / ".config" / "moonbit-up"
-    config_dir.mkdir(parents=True)
-    monkeypatch.setattr("moonbit_up.version.get_config_dir", lambda: config_dir)
+def temp_config_dir(tmp_path_factory, monkeypatch):
+    """Create a fresh temporary config directory."""
+    config_dir = tmp_path_factory.mktemp("config")
+    monkeypatch.setattr(version_module, "get_config_dir", lambda: config_dir)
     return config_dir
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_index():
-    """Sample moonbit-binaries index data."""
+    """Sample moonbit-binaries index data.
+
+    Built once and shared by every test, so tests must not mutate it.
+    """
     return {
         "linux-x64": {
             "last_modified": "2024-12-23T10:00:00",
@@ -47,46 +87,69 @@ def sample_index():
     }
 
 
+@pytest.fixture(scope="session")
+def sample_index_file(tmp_path_factory, sample_index):
+    """Sample index written to disk once per session."""
+    index_file = tmp_path_factory.mktemp("index") / "index.json"
+    index_file.write_text(json.dumps(sample_index))
+    return index_file
+
+
+@pytest.fixture
+def patch_index(monkeypatch):
+    """Return a function that makes fetch_moonbit_binaries_index return a value."""
+    def apply(index):
+        monkeypatch.setattr(version_module, "fetch_moonbit_binaries_index", lambda: index)
+    return apply
+
+
 class TestVersionInfo:
     """Tests for VersionInfo dataclass."""
 
-    def test_version_info_creation(self):
-        """Test creating a VersionInfo object."""
+    @pytest.mark.parametrize("backup_path", [None, "/home/user/.moon.backup.20241223_100000"])
+    def test_version_info_creation(self, backup_path):
+        """Test creating a VersionInfo object with and without a backup path."""
+        kwargs = {"backup_path": backup_path} if backup_path else {}
         version = VersionInfo(
             version="0.1.20241223+62b9a1a85",
             installed_at="2024-12-23T10:00:00",
-            backup_path="/home/user/.moon.backup.20241223_100000"
+            **kwargs
         )
 
         assert version.version == "0.1.20241223+62b9a1a85"
         assert version.installed_at == "2024-12-23T10:00:00"
-        assert version.backup_path == "/home/user/.moon.backup.20241223_100000"
-
-    def test_version_info_without_backup(self):
-        """Test creating VersionInfo without backup path."""
-        version = VersionInfo(
-            version="0.1.20241223+62b9a1a85",
-            installed_at="2024-12-23T10:00:00"
-        )
-
-        assert version.backup_path is None
+        assert version.backup_path == backup_path
+        assert hasattr(VersionInfo, "__slots__")
 
 
 class TestAvailableVersion:
     """Tests for AvailableVersion dataclass."""
 
-    def test_available_version_creation(self):
-        """Test creating an AvailableVersion object."""
+    @pytest.mark.parametrize("last_modified", [None, "2024-12-23T10:00:00"])
+    def test_available_version_creation(self, last_modified):
+        """Test creating an AvailableVersion object with and without a timestamp."""
+        kwargs = {"last_modified": last_modified} if last_modified else {}
         version = AvailableVersion(
             version="0.1.20241223+62b9a1a85",
             filename="moonbit-v0.1.20241223+62b9a1a85-linux-x64.tar.gz",
             sha256="e613706d44dea09c4089b137884fc64ce6b9ce0e43661778432eeaa8b6c6d519",
-            last_modified="2024-12-23T10:00:00"
+            **kwargs
         )
 
         assert version.version == "0.1.20241223+62b9a1a85"
         assert version.filename.endswith(".tar.gz")
         assert len(version.sha256) == 64
+        assert version.last_modified == last_modified
+        assert hasattr(AvailableVersion, "__slots__")
+
+    def test_available_version_is_immutable_and_hashable(self):
+        """Test that AvailableVersion can be used as a cache key."""
+        version = AvailableVersion(version="0.1.20241223+62b9a1a85", filename="a.tar.gz", sha256="")
+
+        with pytest.raises(FrozenInstanceError):
+            version.version = "other"
+        assert {version: 1}[AvailableVersion("0.1.20241223+62b9a1a85", "a.tar.gz", "")] == 1
+        assert not hasattr(version, "__dict__")
 
 
 class TestVersionManager:
@@ -95,104 +158,137 @@ class TestVersionManager:
     def test_version_manager_init_creates_history_file(self, temp_config_dir):
         """Test that VersionManager creates history file on init."""
         manager = VersionManager()
-        history_file = temp_config_dir / "version_history.json"
+        history_file = temp_config_dir / "version_history.jsonl"
 
         assert history_file.exists()
-        content = json.loads(history_file.read_text())
-        assert "versions" in content
-        assert content["versions"] == []
+        assert history_file.read_bytes() == b""
 
-    def test_add_version(self, temp_config_dir):
-        """Test adding a version to history."""
-        manager = VersionManager()
-        manager.add_version("0.1.20241223+62b9a1a85", Path("/backup/path"))
+    def test_version_manager_checks_history_file_once(self, temp_config_dir, monkeypatch):
+        """Test that later managers skip the history file existence check."""
+        VersionManager()
 
-        history = manager.get_history()
-        assert len(history) == 1
-        assert history[0].version == "0.1.20241223+62b9a1a85"
-        assert history[0].backup_path == "/backup/path"
+        def fail_exists(self):
+            raise AssertionError("history file should not be checked again")
 
-    def test_add_version_without_backup(self, temp_config_dir):
-        """Test adding a version without backup path."""
-        manager = VersionManager()
-        manager.add_version("0.1.20241223+62b9a1a85")
+        monkeypatch.setattr(Path, "exists", fail_exists)
+        VersionManager()
 
-        history = manager.get_history()
-        assert len(history) == 1
-        assert history[0].backup_path is None
+    def test_version_manager_migrates_json_history(self, temp_config_dir):
+        """Test that an existing JSON history is converted to JSON lines once."""
+        legacy_file = temp_config_dir / "version_history.json"
+        legacy_file.write_text(json.dumps({"versions": [
+            {"version": "0.1.20241223+v1", "installed_at": "2024-12-23T10:00:00", "backup_path": "/backup1"},
+            {"version": "0.1.20241224+v2", "installed_at": "2024-12-24T10:00:00", "backup_path": None},
+        ]}))
 
-    def test_get_history(self, temp_config_dir):
-        """Test getting version history."""
         manager = VersionManager()
-        manager.add_version("0.1.20241223+v1")
-        manager.add_version("0.1.20241224+v2")
+        manager.add_version("0.1.20241225+v3")
 
-        history = manager.get_history()
-        assert len(history) == 2
-        assert history[0].version == "0.1.20241223+v1"
-        assert history[1].version == "0.1.20241224+v2"
+        assert not legacy_file.exists()
+        assert [v.version for v in manager.get_history()] == [
+            "0.1.20241223+v1", "0.1.20241224+v2", "0.1.20241225+v3"
+        ]
+        assert manager.get_previous_version().version == "0.1.20241224+v2"
+        assert len((temp_config_dir / "version_history.jsonl").read_text().splitlines()) == 3
+
+    @pytest.mark.parametrize("content", ['{"versions": [', '["not", "a", "history"]', '{}'])
+    def test_version_manager_keeps_unreadable_json_history(self, temp_config_dir, mock_console, content):
+        """Test that a corrupt legacy history is kept aside instead of deleted."""
+        legacy_file = temp_config_dir / "version_history.json"
+        legacy_file.write_text(content)
 
-    def test_get_previous_version(self, temp_config_dir):
-        """Test getting previous version for rollback."""
         manager = VersionManager()
-        manager.add_version("0.1.20241223+v1", Path("/backup1"))
-        manager.add_version("0.1.20241224+v2", Path("/backup2"))
 
-        previous = manager.get_previous_version()
-        assert previous is not None
-        assert previous.version == "0.1.20241223+v1"
-        assert previous.backup_path == "/backup1"
+        assert manager.get_history() == []
+        assert (temp_config_dir / "version_history.json.bak").read_text() == content
+        assert not legacy_file.exists()
+        assert "Could not migrate version history" in mock_console.getvalue()
 
-    def test_get_previous_version_with_insufficient_history(self, temp_config_dir):
-        """Test getting previous version when history is insufficient."""
+    def test_get_history_reads_file_once(self, temp_config_dir, monkeypatch):
+        """Test that the history is parsed once and kept current by add_version."""
         manager = VersionManager()
         manager.add_version("0.1.20241223+v1")
+        assert [v.version for v in manager.get_history()] == ["0.1.20241223+v1"]
 
-        previous = manager.get_previous_version()
-        assert previous is None
+        parses = []
+        original = VersionManager._parse_entries
+        monkeypatch.setattr(
+            VersionManager, "_parse_entries",
+            staticmethod(lambda lines: parses.append(1) or original(lines))
+        )
+        manager.add_version("0.1.20241224+v2")
+
+        assert [v.version for v in manager.get_history()] == ["0.1.20241223+v1", "0.1.20241224+v2"]
+        assert manager.get_previous_version().version == "0.1.20241223+v1"
+        assert parses == []
+
+    def test_show_history_formats_install_times(self, temp_config_dir, mock_console):
+        """Test that install timestamps are shown to the second."""
+        (temp_config_dir / "version_history.jsonl").write_text(
+            '{"version":"0.1.20241223+v1","installed_at":"2024-12-23T10:00:00.123456","backup_path":null}\n'
+            '{"version":"0.1.20241224+v2","installed_at":"2024-12-24","backup_path":"/b"}\n'
+        )
 
-    def test_get_previous_version_empty_history(self, temp_config_dir):
-        """Test getting previous version with empty history."""
+        VersionManager().show_history()
+
+        output = mock_console.getvalue()
+        assert "2024-12-23 10:00:00" in output
+        assert "2024-12-24 00:00:00" in output
+
+    @pytest.mark.parametrize(
+        "adds, expected_previous",
+        [
+            ([], None),
+            ([("0.1.20241223+v1", None)], None),
+            ([("0.1.20241223+v1", "/backup/path")], None),
+            ([("0.1.20241223+v1", "/backup1"), ("0.1.20241224+v2", "/backup2")], ("0.1.20241223+v1", "/backup1")),
+            ([("0.1.20241223+v1", None), ("0.1.20241224+v2", None), ("0.1.20241225+v3", None)], ("0.1.20241224+v2", None)),
+        ],
+        ids=["empty", "one-without-backup", "one-with-backup", "two", "three"],
+    )
+    def test_add_and_get_versions(self, temp_config_dir, adds, expected_previous):
+        """Test recording versions and reading back the history and rollback target."""
         manager = VersionManager()
-        previous = manager.get_previous_version()
-        assert previous is None
+        for version, backup_path in adds:
+            manager.add_version(version, Path(backup_path) if backup_path else None)
+
+        # A fresh manager reads the same history back from disk
+        for reader in (manager, VersionManager()):
+            history = reader.get_history()
+            assert [(v.version, v.backup_path) for v in history] == adds
+
+            previous = reader.get_previous_version()
+            if expected_previous is None:
+                assert previous is None
+            else:
+                assert (previous.version, previous.backup_path) == expected_previous
 
 
 class TestFetchMoonbitBinariesIndex:
     """Tests for fetch_moonbit_binaries_index function."""
 
-    @responses.activate
     def test_fetch_index_from_https(self, sample_index, monkeypatch):
         """Test fetching index from HTTPS URL."""
         # Mock config to return HTTPS URL
-        mock_config = Mock()
-        mock_config.mirror.index_url = "https://example.com/index.json"
-        monkeypatch.setattr("moonbit_up.version.load_config", lambda: mock_config)
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
         # Mock HTTP response
-        responses.add(
-            responses.GET,
-            "https://example.com/index.json",
-            json=sample_index,
-            status=200
-        )
+        session = FakeSession(FakeResponse(sample_index, 200))
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
 
         index = fetch_moonbit_binaries_index()
 
         assert index is not None
         assert "linux-x64" in index
         assert len(index["linux-x64"]["releases"]) == 2
+        assert [url for url, _ in session.calls] == ["https://example.com/index.json"]
 
-    def test_fetch_index_from_file(self, tmp_path, sample_index, monkeypatch):
+    def test_fetch_index_from_file(self, sample_index_file, monkeypatch):
         """Test fetching index from file:// URL."""
-        # Create a local index file
-        index_file = tmp_path / "index.json"
-        index_file.write_text(json.dumps(sample_index))
-
         # Mock config to return file:// URL
-        mock_config = Mock()
-        mock_config.mirror.index_url = f"file://{index_file}"
-        monkeypatch.setattr("moonbit_up.version.load_config", lambda: mock_config)
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url=f"file://{sample_index_file}"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
         index = fetch_moonbit_binaries_index()
 
@@ -202,80 +298,160 @@ class TestFetchMoonbitBinariesIndex:
 
     def test_fetch_index_file_not_found(self, monkeypatch):
         """Test fetching index from non-existent file."""
-        mock_config = Mock()
-        mock_config.mirror.index_url = "file:///nonexistent/index.json"
-        monkeypatch.setattr("moonbit_up.version.load_config", lambda: mock_config)
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="file:///nonexistent/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
         index = fetch_moonbit_binaries_index()
 
         assert index is None
 
-    @responses.activate
     def test_fetch_index_http_error(self, monkeypatch):
         """Test handling HTTP errors."""
-        mock_config = Mock()
-        mock_config.mirror.index_url = "https://example.com/index.json"
-        monkeypatch.setattr("moonbit_up.version.load_config", lambda: mock_config)
-
-        responses.add(
-            responses.GET,
-            "https://example.com/index.json",
-            status=404
-        )
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
+
+        session = FakeSession(FakeResponse(None, 404))
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
 
         index = fetch_moonbit_binaries_index()
 
         assert index is None
 
+    def test_fetch_index_revalidates_with_etag(self, sample_index, monkeypatch):
+        """Test that a 304 response returns the cached index."""
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
-class TestListAvailableVersions:
-    """Tests for list_available_versions function."""
-
-    def test_list_versions(self, sample_index, monkeypatch):
-        """Test listing available versions."""
-        monkeypatch.setattr(
-            "moonbit_up.version.fetch_moonbit_binaries_index",
-            lambda: sample_index
+        session = FakeSession(
+            FakeResponse(sample_index, 200, {"ETag": '"v1"'}),
+            FakeResponse(None, 304),
+        )
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
+        assert fetch_moonbit_binaries_index() == sample_index
+
+        # A new run revalidates the on-disk copy instead of redownloading
+        _cached_get_json.cache_clear()
+        assert fetch_moonbit_binaries_index() == sample_index
+        assert session.calls[-1][1]["If-None-Match"] == '"v1"'
+
+    def test_fetch_index_revalidates_with_last_modified(self, sample_index, monkeypatch):
+        """Test that Last-Modified is sent back as If-Modified-Since."""
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
+
+        last_modified = "Mon, 23 Dec 2024 10:00:00 GMT"
+        session = FakeSession(
+            FakeResponse(sample_index, 200, {"Last-Modified": last_modified}),
+            FakeResponse(None, 304),
         )
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
+        assert fetch_moonbit_binaries_index() == sample_index
 
-        versions = list_available_versions()
+        _cached_get_json.cache_clear()
+        assert fetch_moonbit_binaries_index() == sample_index
+        request_headers = session.calls[-1][1]
+        assert request_headers["If-Modified-Since"] == last_modified
+        assert "If-None-Match" not in request_headers
 
-        assert len(versions) == 2
-        assert versions[0].version == "0.1.20241223+62b9a1a85"
-        assert versions[1].version == "0.1.20241218+f4a066f5f"
+    def test_fetch_index_memoized_within_run(self, sample_index, monkeypatch):
+        """Test that the index is fetched at most once per run."""
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
-    def test_list_versions_with_limit(self, sample_index, monkeypatch):
-        """Test listing versions with limit."""
-        monkeypatch.setattr(
-            "moonbit_up.version.fetch_moonbit_binaries_index",
-            lambda: sample_index
-        )
+        session = FakeSession(FakeResponse(sample_index, 200))
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
 
-        versions = list_available_versions(limit=1)
+        fetch_moonbit_binaries_index()
+        fetch_moonbit_binaries_index()
 
-        assert len(versions) == 1
-        assert versions[0].version == "0.1.20241223+62b9a1a85"
+        assert len(session.calls) == 1
 
-    def test_list_versions_empty_index(self, monkeypatch):
-        """Test listing versions when index fetch fails."""
-        monkeypatch.setattr(
-            "moonbit_up.version.fetch_moonbit_binaries_index",
-            lambda: None
-        )
+    def test_fetch_index_memo_expires(self, sample_index, monkeypatch):
+        """Test that the in-process memo is refreshed after INDEX_TTL."""
+        mock_config = SimpleNamespace(mirror=SimpleNamespace(index_url="https://example.com/index.json"))
+        monkeypatch.setattr(version_module, "load_config", lambda: mock_config)
 
-        versions = list_available_versions()
+        session = FakeSession(FakeResponse(sample_index, 200))
+        monkeypatch.setattr(version_module, "get_session", lambda: session)
 
-        assert versions == []
+        now = 1_000_000.0
+        monkeypatch.setattr(version_module.time, "time", lambda: now)
+        fetch_moonbit_binaries_index()
+        fetch_moonbit_binaries_index()
+        assert len(session.calls) == 1
 
-    def test_list_versions_preserves_metadata(self, sample_index, monkeypatch):
-        """Test that version metadata is preserved."""
-        monkeypatch.setattr(
-            "moonbit_up.version.fetch_moonbit_binaries_index",
-            lambda: sample_index
-        )
+        now += INDEX_TTL
+        fetch_moonbit_binaries_index()
+        assert len(session.calls) == 2
 
-        versions = list_available_versions()
 
+class TestListAvailableVersions:
+    """Tests for list_available_versions function."""
+
+    @pytest.mark.parametrize(
+        "limit, expected",
+        [
+            (None, ["0.1.20241223+62b9a1a85", "0.1.20241218+f4a066f5f"]),
+            (1, ["0.1.20241223+62b9a1a85"]),
+        ],
+        ids=["all", "limit"],
+    )
+    def test_list_versions(self, sample_index, patch_index, limit, expected):
+        """Test listing available versions with their metadata."""
+        patch_index(sample_index)
+
+        versions = list_available_versions(limit=limit)
+
+        assert [v.version for v in versions] == expected
         assert versions[0].filename == "moonbit-v0.1.20241223+62b9a1a85-linux-x64.tar.gz"
         assert versions[0].sha256 == "e613706d44dea09c4089b137884fc64ce6b9ce0e43661778432eeaa8b6c6d519"
         assert versions[0].last_modified == "2024-12-23T10:00:00"
+
+    def test_list_versions_empty_index(self, patch_index):
+        """Test listing versions when index fetch fails."""
+        patch_index(None)
+
+        versions = list_available_versions()
+
+        assert versions == []
+
+
+class TestFetchAvailableVersions:
+    """Tests for fetch_available_versions function."""
+
+    def test_release_dates_from_version_strings(self, monkeypatch, mock_console):
+        """Test that release dates are read from the version string."""
+        versions = [
+            AvailableVersion(version=v, filename=f"{v}.tar.gz", sha256="")
+            for v in ("0.1.20241223+62b9a1a85", "0.1.20241399+badbad", "0.1.20240231+feb31", "0.6.31")
+        ]
+        monkeypatch.setattr(version_module, "list_available_versions", lambda limit=None: versions)
+
+        fetch_available_versions()
+
+        output = mock_console.getvalue()
+        assert "2024-12-23" in output
+        assert "2024-02-31" not in output
+        assert output.count("Unknown") == 3
+
+    def test_no_history_file_is_created(self, temp_config_dir, monkeypatch, mock_console):
+        """Test that listing versions does not create a history file."""
+        versions = [AvailableVersion("0.1.20241223+62b9a1a85", "a.tar.gz", "")]
+        monkeypatch.setattr(version_module, "list_available_versions", lambda limit=None: versions)
+
+        fetch_available_versions()
+
+        assert not (temp_config_dir / "version_history.jsonl").exists()
+        assert "Previously Installed Versions" not in mock_console.getvalue()
+
+    def test_lists_previously_installed_versions(self, temp_config_dir, monkeypatch, mock_console):
+        """Test that installed versions are listed when a history exists."""
+        VersionManager().add_version("0.1.20241223+62b9a1a85")
+        versions = [AvailableVersion("0.1.20241223+62b9a1a85", "a.tar.gz", "")]
+        monkeypatch.setattr(version_module, "list_available_versions", lambda limit=None: versions)
+
+        fetch_available_versions()
+
+        output = mock_console.getvalue()
+        assert "Previously Installed Versions" in output
+        assert "• 0.1.20241223+62b9a1a85 (installed" in output